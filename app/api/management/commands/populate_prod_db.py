@@ -346,13 +346,16 @@ class Command(BaseCommand):
                 answer_list = Answer.objects.filter(question=question)
                 for answer in answer_list:
                     # Create the UserAnswerAttempt instance for each answer
-                    user_answer_attempts.append(UserAnswerAttempt(
+                    user_answer_attempt = UserAnswerAttempt(
                         user_quest_attempt=user_quest_attempt,
                         question=question,
                         answer=answer,
                         is_selected=random.choice([True, False]),
                         # score_achieved can be ignored or set to default
-                    ))
+                    )
+                    # bulk_create skips save(), so derive is_correct here
+                    user_answer_attempt.derive_is_correct()
+                    user_answer_attempts.append(user_answer_attempt)
             # Bulk create all UserAnswerAttempt instances
             UserAnswerAttempt.objects.bulk_create(user_answer_attempts)
 
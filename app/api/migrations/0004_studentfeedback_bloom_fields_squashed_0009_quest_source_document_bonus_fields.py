@@ -0,0 +1,86 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    replaces = [('api', '0004_studentfeedback_bloom_fields'), ('api', '0005_question_type_structured_data'), ('api', '0006_question_hint_useranswerattempt_hint_used'), ('api', '0007_userquestattempt_bonus_points'), ('api', '0008_remove_userquestattempt_bonus_points'), ('api', '0009_quest_source_document_bonus_fields')]
+
+    dependencies = [
+        ('api', '0003_useranswerattempt_is_correct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentfeedback',
+            name='quest_summary',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='studentfeedback',
+            name='subtopic_feedback',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='studentfeedback',
+            name='study_tips',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='recommendations',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='question_feedback',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='strengths',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='weaknesses',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='question_type',
+            field=models.CharField(default='mcq', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='structured_data',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='hint',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='useranswerattempt',
+            name='hint_used',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='quest',
+            name='source_document',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quests', to='api.document'),
+        ),
+        migrations.AddField(
+            model_name='userquestattempt',
+            name='bonus_points',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userquestattempt',
+            name='bonus_awarded',
+            field=models.BooleanField(default=False),
+        ),
+    ]
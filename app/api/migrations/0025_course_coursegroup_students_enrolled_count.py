@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-15 09:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_students_enrolled_count(apps, schema_editor):
+    Course = apps.get_model("api", "Course")
+    CourseGroup = apps.get_model("api", "CourseGroup")
+    UserCourseGroupEnrollment = apps.get_model("api", "UserCourseGroupEnrollment")
+
+    group_counts = UserCourseGroupEnrollment.objects.filter(
+        course_group=OuterRef("pk")
+    ).order_by().values("course_group").annotate(total=Count("pk")).values("total")
+    CourseGroup.objects.update(students_enrolled_count=Coalesce(Subquery(group_counts), Value(0)))
+
+    course_counts = UserCourseGroupEnrollment.objects.filter(
+        course_group__course=OuterRef("pk")
+    ).order_by().values("course_group__course").annotate(total=Count("pk")).values("total")
+    Course.objects.update(students_enrolled_count=Coalesce(Subquery(course_counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0024_cosmetic_purchaseable"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="students_enrolled_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="coursegroup",
+            name="students_enrolled_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_students_enrolled_count, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-15 09:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_cached_question_totals(apps, schema_editor):
+    Quest = apps.get_model("api", "Quest")
+    Question = apps.get_model("api", "Question")
+
+    questions = Question.objects.filter(quest=OuterRef("pk")).order_by().values("quest")
+    Quest.objects.update(
+        cached_total_max_score=Coalesce(Subquery(questions.annotate(total=Sum("max_score")).values("total")), Value(0.0)),
+        cached_question_count=Coalesce(Subquery(questions.annotate(total=Count("pk")).values("total")), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0025_course_coursegroup_students_enrolled_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quest",
+            name="cached_total_max_score",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="quest",
+            name="cached_question_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_cached_question_totals, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_quest_cached_question_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['quest', 'number'], name='api_questio_quest_i_6221fb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useranswerattempt',
+            index=models.Index(fields=['user_quest_attempt', 'question'], name='api_userans_user_qu_c6dcc3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userquestattempt',
+            index=models.Index(fields=['student', 'quest'], name='api_userque_student_ec6942_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userquestattempt',
+            index=models.Index(fields=['quest', 'submitted'], name='api_userque_quest_i_c86082_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:22
+
+import api.utils
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_add_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='structured_data',
+            field=models.JSONField(blank=True, default=dict, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='studentcognitiveprofile',
+            name='weak_topics',
+            field=models.JSONField(default=dict, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='quest_summary',
+            field=models.JSONField(blank=True, default=dict, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='question_feedback',
+            field=models.JSONField(blank=True, default=dict, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='strengths',
+            field=models.JSONField(blank=True, default=list, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='study_tips',
+            field=models.JSONField(blank=True, default=list, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='subtopic_feedback',
+            field=models.JSONField(blank=True, default=list, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='studentfeedback',
+            name='weaknesses',
+            field=models.JSONField(blank=True, default=list, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.AddIndex(
+            model_name='studentcognitiveprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['weak_topics'], name='cognitive_weak_topics_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:24
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_answer_attempts(apps, schema_editor):
+    UserAnswerAttempt = apps.get_model('api', 'UserAnswerAttempt')
+    duplicates = (
+        UserAnswerAttempt.objects
+        .values('user_quest_attempt_id', 'question_id', 'answer_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        rows = UserAnswerAttempt.objects.filter(
+            user_quest_attempt_id=duplicate['user_quest_attempt_id'],
+            question_id=duplicate['question_id'],
+            answer_id=duplicate['answer_id'],
+        ).order_by('-is_selected', 'id')
+        # Keep the selected (or oldest) row, drop the rest
+        keep_id = rows.values_list('id', flat=True).first()
+        rows.exclude(id=keep_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_unicode_json_fields_weak_topics_gin'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answer_attempts, reverse_code=migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='useranswerattempt',
+            name='api_userans_user_qu_c6dcc3_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='useranswerattempt',
+            constraint=models.UniqueConstraint(fields=('user_quest_attempt', 'question', 'answer'), name='uniq_user_answer'),
+        ),
+    ]
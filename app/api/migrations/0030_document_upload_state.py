@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:27
+
+from django.db import migrations, models
+
+
+def mark_existing_documents_ready(apps, schema_editor):
+    # Documents uploaded before this migration were stored synchronously
+    Document = apps.get_model('api', 'Document')
+    Document.objects.update(upload_state='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_useranswerattempt_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='upload_state',
+            field=models.CharField(default='pending', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_documents_ready, reverse_code=migrations.RunPython.noop),
+    ]
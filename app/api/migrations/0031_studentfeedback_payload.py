@@ -0,0 +1,69 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:40
+
+import api.utils
+from django.db import migrations, models
+
+
+FEEDBACK_SECTIONS = [
+    'strengths',
+    'weaknesses',
+    'recommendations',
+    'question_feedback',
+    'quest_summary',
+    'subtopic_feedback',
+    'study_tips',
+]
+
+
+BATCH_SIZE = 500
+
+
+def _update_in_batches(StudentFeedback, update_feedback, fields):
+    """
+    Stream the feedback rows and write them back BATCH_SIZE at a time
+    """
+    batch = []
+    for feedback in StudentFeedback.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        update_feedback(feedback)
+        batch.append(feedback)
+        if len(batch) == BATCH_SIZE:
+            StudentFeedback.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        StudentFeedback.objects.bulk_update(batch, fields)
+
+
+def copy_sections_into_payload(apps, schema_editor):
+    StudentFeedback = apps.get_model('api', 'StudentFeedback')
+
+    def update_feedback(feedback):
+        feedback.payload = {section: getattr(feedback, section) for section in FEEDBACK_SECTIONS}
+
+    _update_in_batches(StudentFeedback, update_feedback, ['payload'])
+
+
+def copy_payload_into_sections(apps, schema_editor):
+    StudentFeedback = apps.get_model('api', 'StudentFeedback')
+
+    def update_feedback(feedback):
+        for section in FEEDBACK_SECTIONS:
+            if section in feedback.payload:
+                setattr(feedback, section, feedback.payload[section])
+
+    _update_in_batches(StudentFeedback, update_feedback, FEEDBACK_SECTIONS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_document_upload_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentfeedback',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict, encoder=api.utils.UnicodeJSONEncoder),
+        ),
+        migrations.RunPython(copy_sections_into_payload, reverse_code=copy_payload_into_sections),
+    ]
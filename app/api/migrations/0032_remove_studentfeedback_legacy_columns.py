@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0031_studentfeedback_payload'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='studentfeedback',
+            name='question_feedback',
+        ),
+        migrations.RemoveField(
+            model_name='studentfeedback',
+            name='quest_summary',
+        ),
+        migrations.RemoveField(
+            model_name='studentfeedback',
+            name='recommendations',
+        ),
+        migrations.RemoveField(
+            model_name='studentfeedback',
+            name='strengths',
+        ),
+        migrations.RemoveField(
+            model_name='studentfeedback',
+            name='study_tips',
+        ),
+        migrations.RemoveField(
+            model_name='studentfeedback',
+            name='subtopic_feedback',
+        ),
+        migrations.RemoveField(
+            model_name='studentfeedback',
+            name='weaknesses',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:31
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.datetime
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_remove_studentfeedback_legacy_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userquestattempt',
+            name='time_taken_ms',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('first_attempted_date__isnull', True), ('last_attempted_date__isnull', True), _connector='OR'), then=models.Value(0)), default=django.db.models.functions.comparison.Greatest(models.Value(0), django.db.models.functions.comparison.Cast(django.db.models.functions.math.Floor(django.db.models.expressions.CombinedExpression(django.db.models.functions.datetime.Extract(django.db.models.expressions.CombinedExpression(models.F('last_attempted_date'), '-', models.F('first_attempted_date')), 'epoch'), '*', models.Value(1000))), models.BigIntegerField()), output_field=models.BigIntegerField()), output_field=models.BigIntegerField()), output_field=models.BigIntegerField()),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-15 22:38
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_badge_awards(apps, schema_editor):
+    for model_name, owner_field in [
+        ('UserCourseBadge', 'user_course_group_enrollment_id'),
+        ('UserQuestBadge', 'user_quest_attempt_id'),
+    ]:
+        model = apps.get_model('api', model_name)
+        duplicates = (
+            model.objects
+            .values('badge_id', owner_field)
+            .annotate(first_id=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        for duplicate in duplicates:
+            # Keep the earliest award
+            model.objects.filter(
+                badge_id=duplicate['badge_id'],
+                **{owner_field: duplicate[owner_field]}
+            ).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_userquestattempt_time_taken_ms'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_badge_awards, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usercoursebadge',
+            constraint=models.UniqueConstraint(fields=('badge', 'user_course_group_enrollment'), name='uniq_badge_enrollment'),
+        ),
+        migrations.AddConstraint(
+            model_name='userquestbadge',
+            constraint=models.UniqueConstraint(fields=('badge', 'user_quest_attempt'), name='uniq_badge_attempt'),
+        ),
+    ]
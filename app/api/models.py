@@ -1,20 +1,44 @@
 import uuid
 from datetime import datetime
+import logging
 import os
 import requests
 import math
 
-from celery import chain
-from django.db import models
+from celery import chain, group
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser
 from django.utils.text import slugify
-from .utils import split_full_name
-from django.db.models import Sum
+from django.utils.functional import cached_property
+from .utils import split_full_name, UnicodeJSONEncoder
+from django.db.models import Case, Count, Exists, F, Max, OuterRef, Prefetch, Q, Subquery, Sum, Value, When, prefetch_related_objects
+from django.db.models.functions import Cast, Coalesce, Extract, Floor, Greatest
 from storages.backends.azure_storage import AzureStorage
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE statement when writing back answer attempt scores
+SCORE_UPDATE_BATCH_SIZE = 100
+
+
+def exclude_counter_fields(instance, counter_fields, kwargs):
+    """
+    Keep a full save() of an existing row from overwriting counters maintained by signals
+    with the stale values held on the instance.
+    """
+    if instance.pk is not None and not instance._state.adding and kwargs.get('update_fields') is None:
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in counter_fields
+        ]
+    return kwargs
+
 
 class EduquestUser(AbstractUser):
     """
@@ -45,74 +69,93 @@ class EduquestUser(AbstractUser):
             old_instance = EduquestUser.objects.get(id=self.id)
         super().save(*args, **kwargs)
 
-        if is_new and not self.is_superuser:
-            # Ensure private learning path exists, then enroll the user.
-            private_course_group = CourseGroup.objects.filter(name="Private Course Group").first()
-            if private_course_group is None:
-                private_academic_year = AcademicYear.objects.filter(start_year=0, end_year=0).order_by('id').first()
-                if private_academic_year is None:
-                    private_academic_year = AcademicYear.objects.create(start_year=0, end_year=0)
-
-                private_term = Term.objects.filter(
-                    academic_year=private_academic_year,
-                    name="Private Term"
-                ).order_by('id').first()
-                if private_term is None:
-                    private_term = Term.objects.create(
-                        academic_year=private_academic_year,
-                        name="Private Term",
-                        start_date=None,
-                        end_date=None
-                    )
-
-                private_course = Course.objects.filter(name="Private Course").first()
-                if private_course is None:
-                    private_image = Image.objects.filter(name="Private Courses").first()
-                    private_course = Course.objects.create(
-                        term=private_term,
-                        name="Private Course",
-                        code="PRIVATE",
-                        type="System-enroll",
-                        description="This is a private course for personal quest generation.",
-                        status="Active",
-                        image=private_image
-                    )
-
-                default_instructor = (
-                    EduquestUser.objects.filter(is_superuser=True).order_by('id').first()
-                    or EduquestUser.objects.filter(is_staff=True).order_by('id').first()
-                    or self
-                )
-                private_course_group = CourseGroup.objects.filter(
-                    course=private_course,
-                    name="Private Course Group"
-                ).order_by('id').first()
-                if private_course_group is None:
-                    private_course_group = CourseGroup.objects.create(
-                        course=private_course,
-                        name="Private Course Group",
-                        session_day="",
-                        session_time="",
-                        instructor=default_instructor
-                    )
-
-            UserCourseGroupEnrollment.objects.get_or_create(student=self, course_group=private_course_group)
-            UserCosmetics.objects.get_or_create(user=self)
-            print(f"[Enroll Private Course Group] User: {self.username} has been enrolled in the Private course group")
-
         if not is_new:    
+            from .tasks import award_consecutive_30days_badge, award_level_border, award_semester_badge
+            badge_tasks = []
             if old_instance.daily_checkin_streak == 29 and self.daily_checkin_streak == 30 and self.daily_checkin_longest_streak == 30:
-                from .tasks import award_consecutive_30days_badge
-                award_consecutive_30days_badge.delay(self.id)
+                badge_tasks.append(award_consecutive_30days_badge.s(self.id))
             
             if old_instance.daily_checkin_streak == 83 and self.daily_checkin_streak == 84 and self.daily_checkin_longest_streak == 84:
-                from .tasks import award_semester_badge
-                award_semester_badge.delay(self.id)
+                badge_tasks.append(award_semester_badge.s(self.id))
 
             if self.total_points > 100 and math.floor(old_instance.total_points) != math.floor(self.total_points):
-                from .tasks import award_level_border
-                award_level_border.delay(self.id)
-
+                badge_tasks.append(award_level_border.s(self.id))
+
+            if badge_tasks:
+                group(badge_tasks).apply_async()
+
+
+
+PRIVATE_COURSE_GROUP_CACHE_KEY = 'private_course_group_id'
+
+
+def ensure_private_course_group(fallback_instructor):
+    """
+    Return the Private Course Group used for personal quest generation, creating it
+    (and its academic year, term and course) if it does not exist yet.
+    """
+    private_course_group = CourseGroup.objects.filter(name="Private Course Group").first()
+    if private_course_group is not None:
+        return private_course_group
+
+    private_academic_year = AcademicYear.objects.filter(start_year=0, end_year=0).order_by('id').first()
+    if private_academic_year is None:
+        private_academic_year = AcademicYear.objects.create(start_year=0, end_year=0)
+
+    private_term = Term.objects.filter(
+        academic_year=private_academic_year,
+        name="Private Term"
+    ).order_by('id').first()
+    if private_term is None:
+        private_term = Term.objects.create(
+            academic_year=private_academic_year,
+            name="Private Term",
+            start_date=None,
+            end_date=None
+        )
+
+    private_course = Course.objects.filter(name="Private Course").first()
+    if private_course is None:
+        private_image = Image.objects.filter(name="Private Courses").first()
+        private_course = Course.objects.create(
+            term=private_term,
+            name="Private Course",
+            code="PRIVATE",
+            type="System-enroll",
+            description="This is a private course for personal quest generation.",
+            status="Active",
+            image=private_image
+        )
+
+    default_instructor = (
+        EduquestUser.objects.filter(is_superuser=True).order_by('id').first()
+        or EduquestUser.objects.filter(is_staff=True).order_by('id').first()
+        or fallback_instructor
+    )
+    private_course_group = CourseGroup.objects.filter(
+        course=private_course,
+        name="Private Course Group"
+    ).order_by('id').first()
+    if private_course_group is None:
+        private_course_group = CourseGroup.objects.create(
+            course=private_course,
+            name="Private Course Group",
+            session_day="",
+            session_time="",
+            instructor=default_instructor
+        )
+    return private_course_group
+
+
+def get_private_course_group_id(fallback_instructor):
+    """
+    Return the id of the Private Course Group, cached so signups skip the lookup.
+    """
+    return cache.get_or_set(
+        PRIVATE_COURSE_GROUP_CACHE_KEY,
+        lambda: ensure_private_course_group(fallback_instructor).id,
+        timeout=None
+    )
 
 
 class Image(models.Model):
@@ -172,6 +215,7 @@ class Course(models.Model):
     status = models.CharField(max_length=100)  # Active, Expired
     image = models.ForeignKey(Image, on_delete=models.SET_NULL, null=True, blank=True)
     coordinators = models.ManyToManyField(EduquestUser, related_name='coordinated_courses')
+    students_enrolled_count = models.PositiveIntegerField(default=0)  # Maintained by enrollment signals
 
     def clean(self):
         super().clean()
@@ -183,29 +227,43 @@ class Course(models.Model):
         is_new_instance = self.pk is None
         old_status_value = None
         if not is_new_instance:
-            old_instance = Course.objects.get(pk=self.pk)
-            old_status_value = old_instance.status
+            old_status_value = Course.objects.filter(pk=self.pk).values_list('status', flat=True).first()
 
-        self.full_clean()  # Call the clean method
+        # Validation runs in the admin forms and API serializers; internal saves are trusted
+        exclude_counter_fields(self, ['students_enrolled_count'], kwargs)
         super(Course, self).save(*args, **kwargs)
 
         # After saving the instance, check if 'status' changed from Active to Expired
         if old_status_value == 'Active' and self.status == 'Expired':
             # Import tasks locally to avoid circular import
-            from .tasks import check_course_completion_and_award_completionist_badge, award_tutorial_attendance_badges_for_course, award_top_ranker_badge
-            # Trigger all tasks
-            check_course_completion_and_award_completionist_badge.delay(self.id)
-            award_tutorial_attendance_badges_for_course.delay(self.id)
-            award_top_ranker_badge.delay(self.id)
-
-            # Recursively set all quests in all course groups to 'Expired'
-            for course_group in self.groups.all():
-                for quest in course_group.quests.all():
-                    quest.status = 'Expired'
-                    quest.save()
+            from .tasks import (
+                award_expert_badge,
+                award_speedster_badge,
+                award_top_ranker_badge,
+                award_tutorial_attendance_badges_for_course,
+                check_course_completion_and_award_completionist_badge
+            )
+
+            # Expire all active quests in all course groups with a single UPDATE
+            quest_ids = list(
+                Quest.objects.filter(course_group__course=self, status='Active').values_list('id', flat=True)
+            )
+            if quest_ids:
+                Quest.objects.filter(id__in=quest_ids).update(status='Expired', expiration_date=timezone.now())
+
+            # Publish the course badge tasks and the expired quests' badge tasks together
+            group(
+                [
+                    check_course_completion_and_award_completionist_badge.s(self.id),
+                    award_tutorial_attendance_badges_for_course.s(self.id),
+                    award_top_ranker_badge.s(self.id)
+                ] +
+                [award_expert_badge.s(quest_id) for quest_id in quest_ids] +
+                [award_speedster_badge.s(quest_id) for quest_id in quest_ids]
+            ).apply_async()
 
     def total_students_enrolled(self):
-        return UserCourseGroupEnrollment.objects.filter(course_group__course=self).count()
+        return self.students_enrolled_count
 
     def __str__(self):
         return f"Term {self.term.name} - {self.code}"
@@ -224,9 +282,14 @@ class CourseGroup(models.Model):
     session_day = models.CharField(max_length=10, null=True, blank=True)  # e.g. Monday, Tuesday, Wednesday
     session_time = models.CharField(max_length=100, null=True, blank=True)  # e.g. 10:00 AM - 12:00 PM, 2:30 PM - 4:30 PM
     instructor = models.ForeignKey(EduquestUser, on_delete=models.CASCADE, related_name='instructed_course_groups')
+    students_enrolled_count = models.PositiveIntegerField(default=0)  # Maintained by enrollment signals
 
     def total_students_enrolled(self):
-        return UserCourseGroupEnrollment.objects.filter(course_group=self).count()
+        return self.students_enrolled_count
+
+    def save(self, *args, **kwargs):
+        exclude_counter_fields(self, ['students_enrolled_count'], kwargs)
+        super(CourseGroup, self).save(*args, **kwargs)
 
     def __str__(self):
         return f"Group {self.name} from {self.course.code}"
@@ -263,25 +326,27 @@ class Quest(models.Model):
     organiser = models.ForeignKey(EduquestUser, on_delete=models.CASCADE, related_name='quests_organised')
     image = models.ForeignKey(Image, on_delete=models.SET_NULL, null=True, blank=True)
     source_document = models.ForeignKey('Document', on_delete=models.SET_NULL, null=True, blank=True, related_name='quests')
+    cached_total_max_score = models.FloatField(default=0)  # Maintained by question signals
+    cached_question_count = models.PositiveIntegerField(default=0)  # Maintained by question signals
 
     def __str__(self):
         return f"{self.name} from Group {self.course_group.course.name} {self.course_group.course.code}"
 
     # Calculate the total max score for all questions in a quest
     def total_max_score(self):
-        return self.questions.aggregate(total_max_score=Sum('max_score'))['total_max_score'] or 0
+        return self.cached_total_max_score
 
     # Calculate the total number of questions in a quest
     def total_questions(self):
-        return self.questions.count()
+        return self.cached_question_count
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         previous_status = None
         if not is_new:
-            previous = Quest.objects.get(pk=self.pk)
-            previous_status = previous.status
+            previous_status = Quest.objects.filter(pk=self.pk).values_list('status', flat=True).first()
 
+        exclude_counter_fields(self, ['cached_total_max_score', 'cached_question_count'], kwargs)
         super(Quest, self).save(*args, **kwargs)
         # If the quest status changed from Active to Expired
         if previous_status == "Active" and self.status == "Expired":
@@ -289,8 +354,7 @@ class Quest(models.Model):
             super(Quest, self).save(update_fields=['expiration_date'])
 
             from .tasks import award_speedster_badge, award_expert_badge
-            award_expert_badge.delay(self.id)
-            award_speedster_badge.delay(self.id)
+            group(award_expert_badge.s(self.id), award_speedster_badge.s(self.id)).apply_async()
 
 
 class Question(models.Model):
@@ -305,13 +369,27 @@ class Question(models.Model):
     hint = models.TextField(null=True, blank=True)
 
     question_type = models.CharField(max_length=50, default="mcq")  # mcq, matching, categorising, latex_mcq, short_ans, latex_short_ans
-    structured_data = models.JSONField(default=dict, blank=True)  # Extra data for non-mcq types
+    structured_data = models.JSONField(default=dict, blank=True, encoder=UnicodeJSONEncoder)  # Extra data for non-mcq types
 
     cognitive_level = models.CharField(max_length=100, null=True, blank=True)  # Bloom's Taxonomy: Remember, Understand, Apply, Analyze, Evaluate, Create
     topic = models.CharField(max_length=255, null=True, blank=True)  # Topic of the question
     difficulty_score = models.FloatField(null=True, blank=True)  # 1-10 scale
     explanation = models.TextField(null=True, blank=True)  # Explanation for the correct answer
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['quest', 'number']),
+        ]
+
+    @cached_property
+    def correct_answer(self):
+        """
+        First correct answer of the question, read from a 'correct_answers' prefetch when one was loaded
+        """
+        if hasattr(self, 'correct_answers'):
+            return self.correct_answers[0] if self.correct_answers else None
+        return self.answers.filter(is_correct=True).order_by('id').first()
+
     def __str__(self):
         return f"{self.number} from Quest ID {self.quest.id}"
 
@@ -349,10 +427,30 @@ class UserQuestAttempt(models.Model):
     submitted = models.BooleanField(default=False)
     first_attempted_date = models.DateTimeField(blank=True, null=True)  # blank for imported quests
     last_attempted_date = models.DateTimeField(blank=True, null=True)  # blank for imported quests
+    # Milliseconds between the first and last attempt, 0 when either is missing or the difference is negative
+    time_taken_ms = models.GeneratedField(
+        expression=Case(
+            When(Q(first_attempted_date__isnull=True) | Q(last_attempted_date__isnull=True), then=Value(0)),
+            default=Greatest(
+                Value(0),
+                Cast(Floor(Extract(F('last_attempted_date') - F('first_attempted_date'), 'epoch') * 1000), models.BigIntegerField()),
+                output_field=models.BigIntegerField()
+            ),
+            output_field=models.BigIntegerField()
+        ),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+    )
     total_score_achieved = models.FloatField(default=0)
     bonus_points = models.FloatField(default=0)
     bonus_awarded = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'quest']),
+            models.Index(fields=['quest', 'submitted']),
+        ]
+
     def __str__(self):
         return f"{self.student.username} attempted {self.quest.name}"
 
@@ -363,16 +461,30 @@ class UserQuestAttempt(models.Model):
         """
         total_score = 0
         user_answer_attempts_to_update = []
-        questions = self.quest.questions.all()
-
-
-        if questions and (questions[0].question_type == "short_ans" or questions[0].question_type == "latex_short_ans"):
+        first_question_type = self.quest.questions.values_list('question_type', flat=True).first()
+
+        if first_question_type == "short_ans" or first_question_type == "latex_short_ans":
+            questions = list(self.quest.questions.all())
+            prefetch_related_objects(questions, Prefetch(
+                'user_short_answer_attempts',
+                queryset=UserShortAnswerAttempt.objects.filter(user_quest_attempt=self).select_related(
+                    'question', 'unstructuredanswer'
+                ),
+                to_attr='short_attempts_for_user'
+            ))
             for question in questions:
-                user_answer = self.short_answer_attempts.get(question=question)
+                if not question.short_attempts_for_user:
+                    raise UserShortAnswerAttempt.DoesNotExist(
+                        f"No short answer attempt for question {question.id} in attempt {self.id}"
+                    )
+                user_answer = question.short_attempts_for_user[0]
                 question_score = 0
                 
                 FLASK_URL = getattr(settings, 'FLASK_MICROSERVICE_URL', 'http://localhost:5000')
-                print(f"user answer question {user_answer.question.text}\nuser answer reason {user_answer.unstructuredanswer.reason}\nuser answer text {user_answer.text}")
+                logger.debug(
+                    "[Short Answer Score] question=%s expected=%s answer=%s",
+                    user_answer.question.text, user_answer.unstructuredanswer.reason, user_answer.text
+                )
                 response = requests.post(
                     f"{FLASK_URL}/generate_short_ans_score",
                     json={
@@ -385,11 +497,9 @@ class UserQuestAttempt(models.Model):
 
                 if response.status_code == 200:
                     question_score = response.json().get('score', '')
-                    print(f"[Short Answer Score Generated] for {user_answer.question}")
+                    logger.info("[Short Answer Score Generated] for %s", user_answer.question)
                 else:
-                    print(f"[Short Answer Score Error] Status: {response.status_code}")
-
-                print("I AM HERE")
+                    logger.error("[Short Answer Score Error] Status: %s", response.status_code)
 
                 user_answer.score_achieved = question_score
                 user_answer_attempts_to_update.append(user_answer)
@@ -402,67 +512,79 @@ class UserQuestAttempt(models.Model):
                 total_score += question_score
 
             # Bulk update all UserAnswerAttempt instances' score_achieved fields
-            UserShortAnswerAttempt.objects.bulk_update(user_answer_attempts_to_update, ['score_achieved'])
+            with transaction.atomic():
+                UserShortAnswerAttempt.objects.bulk_update(
+                    user_answer_attempts_to_update, ['score_achieved'], batch_size=SCORE_UPDATE_BATCH_SIZE
+                )
         else:
-            for question in questions:
-                answers = question.answers.all()
-                num_options = answers.count()
-                num_correct = answers.filter(is_correct=True).count()
-
-                if num_options == 0:
-                    continue  # Avoid division by zero
-
-                weight_per_option = question.max_score / (num_correct or 1)
-                user_answers = self.answer_attempts.filter(question=question)
-                question_score = 0
+            answer_attempts = UserAnswerAttempt.objects.filter(user_quest_attempt=self)
+            # Each correct option is worth max_score / number of correct options
+            weight_per_option = Question.objects.filter(pk=OuterRef('question_id')).annotate(
+                weight=F('max_score') / Greatest(Count('answers', filter=Q(answers__is_correct=True)), Value(1))
+            ).values('weight')
+            selected_correctly = Q(is_selected=True) & Exists(
+                Answer.objects.filter(pk=OuterRef('answer_id'), is_correct=True)
+            )
 
-                for ua in user_answers:
-                    # Use the is_correct field from UserAnswerAttempt (tracks if THIS student got it right)
-                    # Only award points if the student selected this answer AND it was correct for them
-                    if ua.is_selected and ua.answer.is_correct:
-                        ua.score_achieved = weight_per_option
-                        question_score += weight_per_option
-                    else:
-                        ua.score_achieved = 0
+            with transaction.atomic():
+                answer_attempts.update(score_achieved=Case(
+                    When(selected_correctly, then=Subquery(weight_per_option)),
+                    default=Value(0.0),
+                    output_field=models.FloatField()
+                ))
+
+                # Deduct the hint penalty from the scored options of each question where a hint was used
+                penalised_attempts = list(answer_attempts.filter(
+                    question_id__in=answer_attempts.filter(hint_used=True).values('question_id'),
+                    score_achieved__gt=0
+                ).order_by('question_id', 'id'))
+                remaining_penalty = {}
+                for ua in penalised_attempts:
+                    penalty = remaining_penalty.setdefault(ua.question_id, 5)
+                    deduction = min(ua.score_achieved, penalty)
+                    ua.score_achieved -= deduction
+                    remaining_penalty[ua.question_id] = penalty - deduction
                     user_answer_attempts_to_update.append(ua)
+                UserAnswerAttempt.objects.bulk_update(
+                    user_answer_attempts_to_update, ['score_achieved'], batch_size=SCORE_UPDATE_BATCH_SIZE
+                )
 
-                hint_used = user_answers.filter(hint_used=True).exists()
-                if hint_used:
-                    remaining_penalty = 5
-                    for ua in user_answers:
-                        if ua.score_achieved > 0 and remaining_penalty > 0:
-                            deduction = min(ua.score_achieved, remaining_penalty)
-                            ua.score_achieved -= deduction
-                            remaining_penalty -= deduction
-                    question_score = max(0, question_score - 5)
-
-                total_score += question_score
-
-            # Bulk update all UserAnswerAttempt instances' score_achieved fields
-            UserAnswerAttempt.objects.bulk_update(user_answer_attempts_to_update, ['score_achieved'])
+            total_score = answer_attempts.aggregate(
+                total=Coalesce(Sum('score_achieved'), Value(0.0))
+            )['total']
 
         return total_score
 
     @property
     def time_taken(self):
-        if not self.first_attempted_date or not self.last_attempted_date:
-            return 0
-        # Calculate the total time taken by subtracting the first_attempted_date from the last_attempted_date
-        time_difference = self.last_attempted_date - self.first_attempted_date
-        # If negative, return 0
-        if time_difference.total_seconds() < 0:
-            return 0
-        return int(time_difference.total_seconds() * 1000)  # Convert to milliseconds
+        return self.time_taken_ms
+
+    def points_for_score_change(self, previous_score):
+        """
+        Students earn points for improving on their best submitted score for a quest,
+        so return how far this attempt raises that best score when it moves from previous_score to its current score.
+        Points are never taken back when a score goes down.
+        """
+        best_other_score = UserQuestAttempt.objects.filter(
+            student_id=self.student_id,
+            quest_id=self.quest_id,
+            submitted=True
+        ).exclude(pk=self.pk).aggregate(
+            max_score=Max('total_score_achieved')
+        )['max_score'] or 0
+        return max(0, self.total_score_achieved - max(previous_score, best_other_score))
 
 
     def save(self, *args, **kwargs):
         is_new_instance = self.pk is None
         old_submitted_value = None
         if not is_new_instance:
-            old_instance = UserQuestAttempt.objects.get(pk=self.pk)
-            old_submitted_value = old_instance.submitted
+            old_submitted_value = UserQuestAttempt.objects.filter(pk=self.pk).values_list('submitted', flat=True).first()
 
         super(UserQuestAttempt, self).save(*args, **kwargs)
+        if not is_new_instance:
+            # The database recomputes time_taken_ms on update, so reload it lazily on next access
+            self.__dict__.pop('time_taken_ms', None)
 
         # After saving the instance, check if 'submitted' changed from False to True
         if old_submitted_value == False and self.submitted == True:
@@ -473,15 +595,15 @@ class UserQuestAttempt(models.Model):
                 generate_personalised_feedback,
                 update_cognitive_profile
             )
-            # Trigger all tasks
-            calculate_score_and_issue_points.delay(self.id)
-            award_first_attempt_badge.delay(self.id)
-            generate_personalised_feedback.delay(self.id)
-            update_cognitive_profile.delay(self.id)
-        elif self.submitted and not hasattr(self, 'personalised_feedback'):
-            # Fallback: ensure feedback is generated if missing after submission
-            from .tasks import generate_personalised_feedback
-            generate_personalised_feedback.delay(self.id)
+            # Score first, then fan out with the score context in a single dispatch
+            chain(
+                calculate_score_and_issue_points.s(self.id),
+                group(
+                    award_first_attempt_badge.s(),
+                    generate_personalised_feedback.s(),
+                    update_cognitive_profile.s()
+                )
+            ).apply_async()
 
 class UserAnswerAttempt(models.Model):
     """
@@ -491,10 +613,32 @@ class UserAnswerAttempt(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='user_answer_attempts')
     answer = models.ForeignKey(Answer, on_delete=models.CASCADE)
     is_selected = models.BooleanField(default=False)
-    is_correct = models.BooleanField(default=False)  # Whether this specific student got this answer correct
+    is_correct = models.BooleanField(default=False)  # Whether this specific student got this answer correct: selected and a correct answer
     hint_used = models.BooleanField(default=False)
     score_achieved = models.FloatField(default=0)
 
+    class Meta:
+        constraints = [
+            # Also serves the (user_quest_attempt, question) lookups through its leading columns
+            models.UniqueConstraint(fields=['user_quest_attempt', 'question', 'answer'], name='uniq_user_answer'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.derive_is_correct()
+        super(UserAnswerAttempt, self).save(*args, **kwargs)
+
+    def derive_is_correct(self):
+        """
+        Mark the attempt correct only when the student selected a correct answer
+        Callers that bulk_create attempts call this themselves, since bulk_create skips save()
+        """
+        if not self.is_selected:
+            self.is_correct = False
+        elif UserAnswerAttempt.answer.is_cached(self):
+            self.is_correct = self.answer.is_correct
+        else:
+            self.is_correct = Answer.objects.filter(pk=self.answer_id, is_correct=True).exists()
+
     def __str__(self):
         return f"{self.user_quest_attempt.student.username} selected {self.answer.text} for question {self.question.number}"
 
@@ -551,6 +695,21 @@ class Badge(models.Model):
         return f"{self.name}"
 
 
+def badge_id_cache_key(name):
+    return f'badge_id:{slugify(name)}'
+
+
+def get_badge_id(name):
+    """
+    Return the id of the badge with this name, cached so award tasks skip the lookup.
+    Raises Badge.DoesNotExist (and caches nothing) if the badge is missing.
+    """
+    return cache.get_or_set(
+        badge_id_cache_key(name),
+        lambda: Badge.objects.values_list('id', flat=True).get(name=name),
+        timeout=None
+    )
+
 
 
 class UserCourseBadge(models.Model):
@@ -570,6 +729,11 @@ class UserCourseBadge(models.Model):
     )
     awarded_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['badge', 'user_course_group_enrollment'], name='uniq_badge_enrollment'),
+        ]
+
     def __str__(self):
         return (f"{self.user_course_group_enrollment.student.username} earned {self.badge.name} from Course "
                 f"{self.user_course_group_enrollment.course_group.course.code} - "
@@ -585,6 +749,11 @@ class UserQuestBadge(models.Model):
     user_quest_attempt = models.ForeignKey(UserQuestAttempt, on_delete=models.CASCADE, related_name='earned_quest_badges')
     awarded_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['badge', 'user_quest_attempt'], name='uniq_badge_attempt'),
+        ]
+
     def __str__(self):
         return (f"{self.user_quest_attempt.student.username} earned {self.badge.name} from Quest "
                 f"{self.user_quest_attempt.quest.name}")
@@ -610,21 +779,22 @@ class Document(models.Model):
     size = models.FloatField()
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(EduquestUser, on_delete=models.CASCADE, related_name='uploaded_documents')
+    upload_state = models.CharField(max_length=10, default='pending')  # pending, ready, error
 
     def save(self, *args, **kwargs):
-        if self.file:
-            storage = AzureStorage()
-            file_name, file_extension = os.path.splitext(self.file.name)
-            unique_file_name = self.file.name
-
-            # Generate a unique file name using UUID
-            while storage.exists(unique_file_name):
-                unique_file_name = f"{file_name}_{uuid.uuid4().hex}{file_extension}"
-
-            self.file.name = unique_file_name
+        is_new_upload = bool(self.file) and not self.file._committed
+        if is_new_upload:
+            # Prefix new uploads with a UUID so the name is unique without probing the storage
+            self.file.name = f"{uuid.uuid4().hex}/{os.path.basename(self.file.name)}"
+            self.upload_state = 'pending'
 
         super(Document, self).save(*args, **kwargs)
 
+        if is_new_upload:
+            # Verify the blob in the background instead of inside the request
+            from .tasks import finalize_document_upload
+            transaction.on_commit(lambda: finalize_document_upload.delay(self.id))
+
     def delete(self, *args, **kwargs):
         storage = AzureStorage()
         if storage.exists(self.file.name):
@@ -727,7 +897,7 @@ class StudentCognitiveProfile(models.Model):
     create_accuracy = models.FloatField(default=0.0)
 
     # Weak topics (JSON field storing topic names and accuracy)
-    weak_topics = models.JSONField(default=dict)  # {topic_name: accuracy} e.g. {"Data Structures": 45.0, "Algorithms": 60.0}
+    weak_topics = models.JSONField(default=dict, encoder=UnicodeJSONEncoder)  # {topic_name: accuracy} e.g. {"Data Structures": 45.0, "Algorithms": 60.0}
 
     # Overall Assessment
     competency_level = models.CharField(max_length=50, default="Beginner")  # Beginner, Intermediate, Advanced
@@ -736,27 +906,56 @@ class StudentCognitiveProfile(models.Model):
     # Timestamp of last update (show to user when profile was last updated)
     last_updated_datetime = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['weak_topics'], name='cognitive_weak_topics_gin', opclasses=['jsonb_path_ops']),
+        ]
+
     def __str__(self):
         return f"Cognitive Profile of {self.student.username}"
 
 
+def _feedback_payload_property(key, default):
+    """
+    Expose one section of StudentFeedback.payload as a read/write attribute.
+    A missing section is stored on first read so in-place changes to it are kept.
+    """
+    def getter(self):
+        return self.payload.setdefault(key, default())
+
+    def setter(self, value):
+        self.payload[key] = value
+
+    return property(getter, setter)
+
+
 class StudentFeedback(models.Model):
     """
     Model to store personalised feedback for each quest attempt
+    The feedback sections are stored together in payload:
+    {
+        # Legacy feedback (kept for backward compatibility)
+        "strengths": [...],  # List of strengths and topics done well
+        "weaknesses": [...],  # List of weaknesses and topics to improve
+        "recommendations": "",  # AI-generated recommendations
+        "question_feedback": {question_id: {feedback, explanation, study_tip}},
+        # Bloom-based feedback (current schema)
+        "quest_summary": {overall_bloom_rating, overall_bloom_level, summary},
+        "subtopic_feedback": [{subtopic, bloom_rating, bloom_level, evidence, improvement_focus}],
+        "study_tips": [tip, ...]
+    }
     """
 
     user_quest_attempt = models.OneToOneField(UserQuestAttempt, on_delete=models.CASCADE, related_name='personalised_feedback')
-
-    # Legacy feedback (kept for backward compatibility)
-    strengths = models.JSONField(default=list, blank=True)  # List of strengths and topics done well
-    weaknesses = models.JSONField(default=list, blank=True)  # List of weaknesses and topics to improve
-    recommendations = models.TextField(blank=True, default="")  # AI-generated recommendations
-    question_feedback = models.JSONField(default=dict, blank=True)  # {question_id: {feedback, explanation, study_tip}}
-
-    # Bloom-based feedback (current schema)
-    quest_summary = models.JSONField(default=dict, blank=True)  # {overall_bloom_rating, overall_bloom_level, summary}
-    subtopic_feedback = models.JSONField(default=list, blank=True)  # [{subtopic, bloom_rating, bloom_level, evidence, improvement_focus}]
-    study_tips = models.JSONField(default=list, blank=True)  # [tip, ...]
+    payload = models.JSONField(default=dict, blank=True, encoder=UnicodeJSONEncoder)
+
+    strengths = _feedback_payload_property('strengths', list)
+    weaknesses = _feedback_payload_property('weaknesses', list)
+    recommendations = _feedback_payload_property('recommendations', str)
+    question_feedback = _feedback_payload_property('question_feedback', dict)
+    quest_summary = _feedback_payload_property('quest_summary', dict)
+    subtopic_feedback = _feedback_payload_property('subtopic_feedback', list)
+    study_tips = _feedback_payload_property('study_tips', list)
 
     datetime_created = models.DateTimeField(auto_now_add=True)
 
@@ -231,6 +231,8 @@ class DocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Document
         fields = '__all__'
+        # upload_state sits next to the file URL so clients can tell a verified upload apart
+        read_only_fields = ['upload_state']
 
 
 class UserCourseGroupEnrollmentSerializer(serializers.ModelSerializer):
@@ -516,6 +518,7 @@ class UserQuestAttemptSerializer(serializers.ModelSerializer):
                         question=question,
                         answer=answer,
                         is_selected=False,
+                        is_correct=False,
                     ))
         
         if short_attempts:
@@ -911,4 +914,9 @@ class StudentFeedbackSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StudentFeedback
-        fields = '__all__'
\ No newline at end of file
+        fields = [
+            'id', 'user_quest_attempt_id', 'user_quest_attempt',
+            'strengths', 'weaknesses', 'recommendations', 'question_feedback',
+            'quest_summary', 'subtopic_feedback', 'study_tips',
+            'datetime_created',
+        ]
\ No newline at end of file
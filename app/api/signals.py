@@ -0,0 +1,122 @@
+import logging
+
+from django.db.models import F, Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    Badge,
+    Course,
+    CourseGroup,
+    EduquestUser,
+    Quest,
+    Question,
+    UserCosmetics,
+    UserCourseGroupEnrollment,
+    PRIVATE_COURSE_GROUP_CACHE_KEY,
+    badge_id_cache_key,
+    get_private_course_group_id,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _adjust_students_enrolled_count(enrollment, delta):
+    """
+    Apply delta to the enrollment counters of the enrollment's course group and course
+    """
+    CourseGroup.objects.filter(pk=enrollment.course_group_id).update(
+        students_enrolled_count=F('students_enrolled_count') + delta
+    )
+    Course.objects.filter(groups__pk=enrollment.course_group_id).update(
+        students_enrolled_count=F('students_enrolled_count') + delta
+    )
+
+
+@receiver(post_save, sender=UserCourseGroupEnrollment)
+def increment_students_enrolled_count(sender, instance, created, **kwargs):
+    if created:
+        _adjust_students_enrolled_count(instance, 1)
+
+
+@receiver(post_delete, sender=UserCourseGroupEnrollment)
+def decrement_students_enrolled_count(sender, instance, **kwargs):
+    _adjust_students_enrolled_count(instance, -1)
+
+
+def _refresh_quest_question_totals(*quest_ids):
+    """
+    Recompute the cached question totals of the given quests in a single UPDATE
+    """
+    questions = Question.objects.filter(quest=OuterRef('pk')).order_by().values('quest')
+    Quest.objects.filter(pk__in=quest_ids).update(
+        cached_total_max_score=Coalesce(Subquery(questions.annotate(total=Sum('max_score')).values('total')), Value(0.0)),
+        cached_question_count=Coalesce(Subquery(questions.annotate(total=Count('pk')).values('total')), Value(0))
+    )
+
+
+@receiver(pre_save, sender=Question)
+def remember_previous_question_quest(sender, instance, raw=False, **kwargs):
+    instance.previous_quest_id = None
+    if not raw and not instance._state.adding:
+        instance.previous_quest_id = Question.objects.filter(pk=instance.pk).values_list('quest_id', flat=True).first()
+
+
+@receiver(post_save, sender=Question)
+def update_quest_question_totals_on_save(sender, instance, created, **kwargs):
+    if created:
+        Quest.objects.filter(pk=instance.quest_id).update(
+            cached_total_max_score=F('cached_total_max_score') + instance.max_score,
+            cached_question_count=F('cached_question_count') + 1
+        )
+    else:
+        # max_score may have been edited, so recompute rather than guess the delta,
+        # together with the quest the question was moved away from
+        previous_quest_id = getattr(instance, 'previous_quest_id', None)
+        if previous_quest_id is not None and previous_quest_id != instance.quest_id:
+            _refresh_quest_question_totals(instance.quest_id, previous_quest_id)
+        else:
+            _refresh_quest_question_totals(instance.quest_id)
+
+
+@receiver(post_delete, sender=Question)
+def update_quest_question_totals_on_delete(sender, instance, **kwargs):
+    Quest.objects.filter(pk=instance.quest_id).update(
+        cached_total_max_score=F('cached_total_max_score') - instance.max_score,
+        cached_question_count=F('cached_question_count') - 1
+    )
+
+
+@receiver(post_save, sender=EduquestUser)
+def enroll_in_private_course_group(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or instance.is_superuser:
+        return
+    UserCourseGroupEnrollment.objects.get_or_create(
+        student=instance,
+        course_group_id=get_private_course_group_id(instance)
+    )
+    UserCosmetics.objects.get_or_create(user=instance)
+    logger.info("[Enroll Private Course Group] Enrolled private group: user=%s", instance.username)
+
+
+@receiver(post_delete, sender=CourseGroup)
+def forget_private_course_group(sender, instance, **kwargs):
+    if instance.name == "Private Course Group":
+        cache.delete(PRIVATE_COURSE_GROUP_CACHE_KEY)
+
+
+@receiver(pre_save, sender=Badge)
+def remember_previous_badge_name(sender, instance, raw=False, **kwargs):
+    instance.previous_name = None
+    if not raw and not instance._state.adding:
+        instance.previous_name = Badge.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Badge)
+@receiver(post_delete, sender=Badge)
+def forget_badge_id(sender, instance, **kwargs):
+    # A renamed badge must also stop resolving under its old name
+    names = {instance.name, getattr(instance, 'previous_name', None)} - {None}
+    cache.delete_many([badge_id_cache_key(name) for name in names])
@@ -7,3 +7,13 @@ class AzureMediaStorage(AzureStorage):
     account_key = settings.AZURE_ACCOUNT_KEY
     azure_container = settings.AZURE_CONTAINER
     expiration_secs = None
+    overwrite_files = False
+
+    def get_available_name(self, name, max_length=None):
+        """
+        Uploaded names are already UUID-prefixed, so skip the existence probe (a HEAD request per upload).
+        Blobs are uploaded with overwrite disabled, so a collision fails the upload instead of replacing a blob.
+        """
+        if max_length is None or len(name) <= max_length:
+            return name
+        return super().get_available_name(name, max_length)
@@ -1,19 +1,74 @@
+import functools
+import json
 import logging
 import math
-from celery import shared_task
+from celery import group, shared_task
 from django.utils import timezone
-from django.db.models import Max, Q
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Coalesce
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from collections import defaultdict
-
-from api.models import EduquestUser, StudentCognitiveProfile, StudentFeedback, UserQuestAttempt
+from datetime import timedelta
+
+from api.models import (
+    Badge,
+    EduquestUser,
+    StudentCognitiveProfile,
+    StudentFeedback,
+    UserAnswerAttempt,
+    UserQuestAttempt,
+    get_badge_id,
+)
 
 # Configure the logger
 logger = logging.getLogger(__name__)
 
 BADGE_POINTS = 50
 
+# Student columns loaded alongside an attempt that may earn badge points,
+# award_badge_points() and EduquestUser.save() read only these
+BADGE_STUDENT_FIELDS = (
+    'student__username',
+    'student__total_points',
+    'student__current_points',
+    'student__daily_checkin_streak',
+    'student__daily_checkin_longest_streak',
+)
+
+# Rows fetched per round trip when streaming scores
+SCORE_ITERATOR_CHUNK_SIZE = 2000
+
+# Seconds a memoized task result is kept
+TASK_RESULT_TIMEOUT = 60 * 60
+
+# Minutes a document may stay pending before the sweep verifies it again
+DOCUMENT_PENDING_RETRY_MINUTES = 10
+# Most pending documents dispatched again per run of retry_pending_document_uploads
+DOCUMENT_RETRY_BATCH_SIZE = 100
+
+# Connect and read timeouts (seconds) for the Flask microservice
+FLASK_TIMEOUT = (3, 30)
+
+# Pooled session for the Flask microservice, reused by every task in the worker process.
+# Feedback generation upserts the feedback row, so gateway errors are safe to retry.
+flask_session = requests.Session()
+_flask_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=frozenset({'POST'}))
+)
+flask_session.mount('http://', _flask_adapter)
+flask_session.mount('https://', _flask_adapter)
+
+# Reused compact encoder for the Flask payloads: no whitespace, and UTF-8 text instead of \u escapes
+FLASK_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+FLASK_JSON_HEADERS = {'Content-Type': 'application/json'}
+
 def award_badge_points(user, badge_name):
     """
     Add points when a badge is earned.
@@ -23,6 +78,61 @@ def award_badge_points(user, badge_name):
     user.save(update_fields=['total_points', 'current_points'])
     logger.info("[Badge Points] Awarded %s points to %s for %s badge", BADGE_POINTS, user.username, badge_name)
 
+def create_missing_badges(badge_model, badge_id, owner_field, owners):
+    """
+    Award the badge to every owner (quest attempt or enrollment) that does not hold it yet,
+    with one SELECT and one INSERT. Returns the newly awarded owners.
+    The unique (badge, owner) constraint turns a concurrent duplicate insert into a no-op.
+    """
+    already_awarded = set(badge_model.objects.filter(
+        badge_id=badge_id, **{f'{owner_field}__in': [owner.id for owner in owners]}
+    ).values_list(f'{owner_field}_id', flat=True))
+    new_owners = [owner for owner in owners if owner.id not in already_awarded]
+    badge_model.objects.bulk_create(
+        [badge_model(badge_id=badge_id, **{owner_field: owner}) for owner in new_owners],
+        ignore_conflicts=True
+    )
+    return new_owners
+
+class SettledResult(str):
+    """
+    Result of a badge task that awarded the badge or found it already held,
+    the only outcome memoize_badge_award() remembers.
+    """
+
+
+def memoize_badge_award(badge_name, key, timeout=TASK_RESULT_TIMEOUT):
+    """
+    Run a badge task once per badge and key. The first run claims the key with cache.add();
+    a settled result is stored so a duplicate run (re-delivered message, repeated fan-out)
+    returns it without querying again, any other outcome frees the key for the next run.
+    The key holds the badge id, so a recreated badge is awarded afresh.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                badge_id = get_badge_id(badge_name)
+            except Badge.DoesNotExist:
+                # Nothing to remember until the badge exists
+                return func(*args, **kwargs)
+            cache_key = f"task_result:{func.__name__}:{badge_id}:{key(*args, **kwargs)}"
+            if not cache.add(cache_key, None, timeout=timeout):
+                return cache.get(cache_key) or f"[{func.__name__}] Skipping duplicate run for {cache_key}"
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                # Let a retry run the task again
+                cache.delete(cache_key)
+                raise
+            if isinstance(result, SettledResult):
+                cache.set(cache_key, str(result), timeout=timeout)
+            else:
+                cache.delete(cache_key)
+            return result
+        return wrapper
+    return decorator
+
 @shared_task
 def test_task():
     """
@@ -42,79 +152,110 @@ def check_expired_quest():
     """
     from .models import Quest
     now = timezone.now()
-    expired_quests = Quest.objects.filter(expiration_date__lt=now, status='Active')
-    expired_quests_ids = [quest.id for quest in expired_quests]
-    if not expired_quests:
-        return "[Expired Quest Check] No expired quests found that need to be updated"
+    with transaction.atomic():
+        # Lock the due quests so an overlapping run skips them instead of expiring them twice
+        expired_quests_ids = list(
+            Quest.objects.filter(expiration_date__lt=now, status='Active')
+            .select_for_update(skip_locked=True).values_list('id', flat=True)
+        )
+        if not expired_quests_ids:
+            return "[Expired Quest Check] No expired quests found that need to be updated"
 
-    for quest in expired_quests:
-        quest.status = 'Expired'
-        quest.save()
-    return f"[Expired Quest Check] {len(expired_quests)} expired quests: {expired_quests_ids}"
+        # Expire in one UPDATE, then dispatch the badge tasks Quest.save would have triggered
+        Quest.objects.filter(id__in=expired_quests_ids).update(status='Expired', expiration_date=now)
+    group(
+        [award_expert_badge.s(quest_id) for quest_id in expired_quests_ids] +
+        [award_speedster_badge.s(quest_id) for quest_id in expired_quests_ids]
+    ).apply_async()
+    return f"[Expired Quest Check] {len(expired_quests_ids)} expired quests: {expired_quests_ids}"
+
+
+def _from_score_context(score_context, key):
+    """
+    Tasks chained after calculate_score_and_issue_points receive its result dict,
+    while direct callers still pass a plain id.
+    """
+    if isinstance(score_context, dict):
+        return score_context.get(key)
+    return score_context
 
 
 @shared_task
 def calculate_score_and_issue_points(user_quest_attempt_id):
     """
     Task update the user's total points.
+    Returns the score context consumed by the tasks chained after it.
     """
-    from django.db import transaction
-    from django.db.models import Max
     from .models import UserQuestAttempt
 
+    score_context = {
+        'attempt_id': user_quest_attempt_id,
+        'student_id': None,
+        'score': None,
+        'message': '',
+    }
     try:
-        # Retrieve the UserQuestAttempt instance
         instance = UserQuestAttempt.objects.get(id=user_quest_attempt_id)
+        score_context['student_id'] = instance.student_id
+
+        # Score before taking any lock, short answers are scored by the Flask microservice
+        total_score_achieved = instance.calculate_total_score_achieved()
 
         # Update the total score achieved and user's total points
         with transaction.atomic():
-            # Calculate the total score achieved
-            total_score_achieved = instance.calculate_total_score_achieved()
+            # Lock only the student's row so concurrent attempts of one student issue points
+            # one at a time against a consistent best score and daily goals
+            student = EduquestUser.objects.select_for_update().only('username', 'daily_goals').get(pk=instance.student_id)
+            previous_score = UserQuestAttempt.objects.values_list('total_score_achieved', flat=True).get(pk=user_quest_attempt_id)
             instance.total_score_achieved = total_score_achieved
-            instance.save(update_fields=['total_score_achieved'])
-
-            # Async tasks to award badges
-            award_perfectionist_badge.delay(user_quest_attempt_id)
-
-            # Get the user's highest score achieved for this quest, excluding the current attempt
-            highest_score_achieved = UserQuestAttempt.objects.filter(
-                student=instance.student,
-                quest=instance.quest,
-                submitted=True
-            ).exclude(pk=instance.pk).aggregate(
-                max_score=Max('total_score_achieved')
-            )['max_score'] or 0
-
-            # Update the user's total points if the new score is higher
-            if total_score_achieved > highest_score_achieved:
-                points_to_add = total_score_achieved - highest_score_achieved
-                instance.student.total_points += points_to_add
-                instance.student.current_points += points_to_add
-
-                for goals in instance.student.daily_goals:
+            # Write the score directly; the points are issued below in the same UPDATE as the daily goal
+            UserQuestAttempt.objects.filter(pk=user_quest_attempt_id).update(total_score_achieved=total_score_achieved)
+            score_context['score'] = total_score_achieved
+
+            # Async tasks to award badges, published together once the score is committed
+            follow_up_tasks = [award_perfectionist_badge.s(user_quest_attempt_id)]
+
+            points_to_add = instance.points_for_score_change(previous_score) if instance.submitted else 0
+            if points_to_add > 0:
+                daily_goals = student.daily_goals
+                for goals in daily_goals:
                     if goals['task'] == 2:
                         goals['complete'] = goals['complete'] + points_to_add
+                EduquestUser.objects.filter(pk=student.pk).update(
+                    total_points=F('total_points') + points_to_add,
+                    current_points=F('current_points') + points_to_add,
+                    daily_goals=daily_goals
+                )
+                follow_up_tasks.append(award_level_border.s(student.id))
+            transaction.on_commit(lambda: group(follow_up_tasks).apply_async())
 
-                instance.student.save(update_fields=['total_points', 'current_points', 'daily_goals'])
-                return f"[Update User Points] User {instance.student.username} earned {points_to_add} points for quest attempt {instance.id}"
-
-            return f"[Update User Points] User {instance.student.username} did not earn any points for quest attempt {instance.id}"
+        if points_to_add > 0:
+            score_context['message'] = f"[Update User Points] User {student.username} earned {points_to_add} points for quest attempt {instance.id}"
+        else:
+            score_context['message'] = f"[Update User Points] User {student.username} did not earn any points for quest attempt {instance.id}"
 
     except UserQuestAttempt.DoesNotExist:
-        return f"[Error] UserQuestAttempt with id {user_quest_attempt_id} does not exist."
+        score_context['message'] = f"[Error] UserQuestAttempt with id {user_quest_attempt_id} does not exist."
     except Exception as e:
-        return f"[Error] Failed to update score and points for UserQuestAttempt {user_quest_attempt_id}: {e}"
+        score_context['message'] = f"[Error] Failed to update score and points for UserQuestAttempt {user_quest_attempt_id}: {e}"
+
+    logger.info(score_context['message'])
+    return score_context
 
 
 @shared_task
-def award_first_attempt_badge(user_quest_attempt_id):
+@memoize_badge_award("First Attempt", key=lambda score_context: _from_score_context(score_context, 'attempt_id'))
+def award_first_attempt_badge(score_context):
     """
     Award the "First Attempt" badge to a user who has attempted a quest for the first time.
     Triggered after a user quest attempt is submitted.
     """
     from .models import UserQuestAttempt, Badge, UserQuestBadge
+    user_quest_attempt_id = _from_score_context(score_context, 'attempt_id')
     try:
-        attempt = UserQuestAttempt.objects.get(id=user_quest_attempt_id)
+        attempt = UserQuestAttempt.objects.select_related('quest').only(
+            'submitted', 'student_id', 'quest__type', 'quest__name'
+        ).get(id=user_quest_attempt_id)
         quest = attempt.quest
 
         if quest.type == "Private":
@@ -123,27 +264,26 @@ def award_first_attempt_badge(user_quest_attempt_id):
         if not attempt.submitted:
             return f"[First Attempt] Attempt for quest: {quest.name} is not submitted yet"
 
-        user = attempt.student
-
-        # Check if the user has any "First Attempt" badge
-        has_badge = UserQuestBadge.objects.filter(
-            user_quest_attempt__student=user,
-            badge__name="First Attempt"
-        ).exists()
+        badge_id = get_badge_id("First Attempt")
 
-        if not has_badge:
-            # Award the "First Attempt" badge
-            badge = Badge.objects.get(name="First Attempt")
-            user_quest_badge, created = UserQuestBadge.objects.get_or_create(
-                badge=badge,
-                user_quest_attempt=attempt
-            )
-            if created:
-                award_badge_points(user, "First Attempt")
-                return f"[First Attempt] Badge awarded to user: {user.username}"
-            else:
-                return f"[First Attempt] User: {user.username} already has the badge"
-        return f"[First Attempt] User: {user.username} already has the badge"
+        with transaction.atomic():
+            # Lock the student's row, as calculate_score_and_issue_points does, so first submissions
+            # of one student on different quests check and award the badge one at a time
+            user = EduquestUser.objects.select_for_update().only(
+                'username', 'total_points', 'current_points'
+            ).get(pk=attempt.student_id)
+
+            # Check if the user has any "First Attempt" badge, by the cached badge id rather than a join on its name
+            has_badge = UserQuestBadge.objects.filter(
+                user_quest_attempt__student_id=user.id,
+                badge_id=badge_id
+            ).exists()
+            if has_badge:
+                return SettledResult(f"[First Attempt] User: {user.username} already has the badge")
+
+            UserQuestBadge.objects.create(badge_id=badge_id, user_quest_attempt=attempt)
+            award_badge_points(user, "First Attempt")
+        return SettledResult(f"[First Attempt] Badge awarded to user: {user.username}")
 
     except UserQuestAttempt.DoesNotExist:
         return f"[First Attempt] UserQuestAttempt with id {user_quest_attempt_id} does not exist."
@@ -151,6 +291,7 @@ def award_first_attempt_badge(user_quest_attempt_id):
         return "[First Attempt] Badge 'First Attempt' does not exist."
 
 @shared_task
+@memoize_badge_award("Perfectionist", key=lambda user_quest_attempt_id: user_quest_attempt_id)
 def award_perfectionist_badge(user_quest_attempt_id):
     """
     Award the "Perfectionist" badge to a user who has achieved full marks for a quest.
@@ -158,13 +299,16 @@ def award_perfectionist_badge(user_quest_attempt_id):
     """
     from .models import Quest, UserQuestAttempt, UserQuestBadge, Badge
     try:
-        attempt = UserQuestAttempt.objects.get(id=user_quest_attempt_id)
+        attempt = UserQuestAttempt.objects.select_related('quest', 'student').only(
+            'submitted', 'total_score_achieved', 'quest__type', 'quest__name', 'quest__cached_total_max_score', *BADGE_STUDENT_FIELDS
+        ).get(id=user_quest_attempt_id)
         quest = attempt.quest
+        quest_max_score = quest.total_max_score()
 
         if quest.type == "Private":
             return f"[Perfectionist] Skipping private quest: {quest.name}"
 
-        if quest.total_max_score() == 0:
+        if quest_max_score == 0:
             return f"[Perfectionist] Skipping Quest: {quest.name} only has open-ended / mcq with no correct ans questions"
 
         if not attempt.submitted:
@@ -174,22 +318,16 @@ def award_perfectionist_badge(user_quest_attempt_id):
         if hint_used:
             return f"[Perfectionist] Skipping Quest: {quest.name} used hints"
 
-        # Calculate the total max score for the quest
-        quest_max_score = quest.total_max_score()
         total_score_achieved = attempt.total_score_achieved
 
         if total_score_achieved == quest_max_score:
             # Award the "Perfectionist" badge
-            badge = Badge.objects.get(name="Perfectionist")
-            user_quest_badge, created = UserQuestBadge.objects.get_or_create(
-                badge=badge,
-                user_quest_attempt=attempt
-            )
-            if created:
+            badge_id = get_badge_id("Perfectionist")
+            if create_missing_badges(UserQuestBadge, badge_id, 'user_quest_attempt', [attempt]):
                 award_badge_points(attempt.student, "Perfectionist")
-                return f"[Perfectionist] Badge awarded to user: {attempt.student.username}"
+                return SettledResult(f"[Perfectionist] Badge awarded to user: {attempt.student.username}")
             else:
-                return f"[Perfectionist] User: {attempt.student.username} already has the badge for this quest"
+                return SettledResult(f"[Perfectionist] User: {attempt.student.username} already has the badge for this quest")
         else:
             return f"[Perfectionist] User: {attempt.student.username} did not achieve full marks: ({total_score_achieved}/{quest_max_score})"
 
@@ -222,35 +360,34 @@ def award_speedster_badge(quest_id):
             total_score_achieved__gt=0
         ).exclude(first_attempted_date=None, last_attempted_date=None)
 
-        if not user_quest_attempts.exists():
-            return f"[Speedster] No eligible attempts for quest: {quest.name}"
-
-        # Filter out attempts with zero or negative time_taken
-        filtered_attempts = [
-            attempt for attempt in user_quest_attempts if attempt.time_taken > 0
-        ]
-
-        if not filtered_attempts:
+        # Number of distinct eligible scores above each attempt's score
+        higher_scores = user_quest_attempts.filter(
+            total_score_achieved__gt=OuterRef('total_score_achieved')
+        ).order_by().values('quest').annotate(
+            count=Count('total_score_achieved', distinct=True)
+        ).values('count')
+
+        # Find the fastest attempt, ignoring zero or negative time_taken, and where its score ranks
+        fastest_attempt = user_quest_attempts.filter(
+            time_taken_ms__gt=0
+        ).annotate(
+            higher_scores=Coalesce(Subquery(higher_scores), 0)
+        ).select_related('student').order_by('time_taken_ms', 'id').first()
+
+        if fastest_attempt is None:
             return f"[Speedster] No attempts with valid time_taken for quest: {quest.name}"
 
-        # Find the fastest attempt
-        fastest_attempt = min(filtered_attempts, key=lambda x: x.time_taken)
         fastest_attempt_score = fastest_attempt.total_score_achieved
 
-        logger.info(f"[Speedster] Fastest attempt for quest: {quest.name} is by user: {fastest_attempt.student.username} with score: {fastest_attempt_score}")
-
-        # Get top three unique scores
-        unique_scores = user_quest_attempts.values_list('total_score_achieved', flat=True).distinct().order_by('-total_score_achieved')[:3]
-        top_three_scores = list(unique_scores)
+        logger.info("[Speedster] Fastest attempt for quest: %s is by user: %s with score: %s", quest.name, fastest_attempt.student.username, fastest_attempt_score)
+        logger.info("[Speedster] %s distinct higher scores for quest: %s", fastest_attempt.higher_scores, quest.name)
 
-        logger.info(f"[Speedster] Top three scores for quest: {quest.name} are: {top_three_scores}")
+        # The fastest score is among the top three unique scores when fewer than three distinct scores beat it
+        is_top_three_score = fastest_attempt.higher_scores < 3
 
-        if fastest_attempt_score in top_three_scores:
-            badge, created = UserQuestBadge.objects.get_or_create(
-                badge=Badge.objects.get(name="Speedster"),
-                user_quest_attempt=fastest_attempt
-            )
-            if created:
+        if is_top_three_score:
+            badge_id = get_badge_id("Speedster")
+            if create_missing_badges(UserQuestBadge, badge_id, 'user_quest_attempt', [fastest_attempt]):
                 award_badge_points(fastest_attempt.student, "Speedster")
                 return f"[Speedster] Badge awarded to user: {fastest_attempt.student.username}"
             else:
@@ -270,7 +407,7 @@ def award_expert_badge(quest_id):
     """
     from .models import Quest, UserQuestAttempt, UserQuestBadge, Badge
     try:
-        quest = Quest.objects.get(id=quest_id)
+        quest = Quest.objects.only('name', 'type', 'status', 'cached_total_max_score').get(id=quest_id)
 
         if quest.type == "Private":
             return f"[Expert] Skipping private quest: {quest.name}"
@@ -281,38 +418,26 @@ def award_expert_badge(quest_id):
         if quest.status != "Expired":
             return f"[Expert] Quest: {quest.name} is not expired yet"
 
-        # Get all user quest attempts for the quest
-        user_quest_attempts = UserQuestAttempt.objects.filter(quest=quest)
-
-        if not user_quest_attempts.exists():
-            return f"[Expert] No attempts found for quest: {quest.name}"
-
-        # Find the highest score
-        highest_score = user_quest_attempts.aggregate(
-            max_score=Max('total_score_achieved')
-        )['max_score'] or 0
+        # Get the attempts with the highest score for the quest in one query
+        top_attempts = list(
+            UserQuestAttempt.objects.filter(quest=quest).annotate(
+                highest_score=Window(expression=Max('total_score_achieved'))
+            ).filter(
+                total_score_achieved=F('highest_score'), highest_score__gt=0
+            ).select_related('student').only('total_score_achieved', *BADGE_STUDENT_FIELDS)
+        )
 
-        if highest_score <= 0:
+        if not top_attempts:
             return f"[Expert] No user scored above 0 for quest: {quest.name}"
 
-        # Get all attempts with the highest score
-        top_attempts = user_quest_attempts.filter(total_score_achieved=highest_score)
-
-        badge = Badge.objects.get(name="Expert")
-        logger.info(f"[Expert] Highest score for quest: {quest.name} is: {highest_score}")
+        highest_score = top_attempts[0].highest_score
+        badge_id = get_badge_id("Expert")
+        logger.info("[Expert] Highest score for quest: %s is: %s", quest.name, highest_score)
 
-        if top_attempts.count() == 0:
-            return f"[Expert] No attempts with the highest score for quest: {quest.name}"
-
-        users_awarded = []
-        for attempt in top_attempts:
-            user_quest_badge, created = UserQuestBadge.objects.get_or_create(
-                badge=badge,
-                user_quest_attempt=attempt
-            )
-            if created:
-                award_badge_points(attempt.student, "Expert")
-            users_awarded.append(attempt.student.username)
+        # Only attempts without the badge yet earn the badge points
+        for attempt in create_missing_badges(UserQuestBadge, badge_id, 'user_quest_attempt', top_attempts):
+            award_badge_points(attempt.student, "Expert")
+        users_awarded = [attempt.student.username for attempt in top_attempts]
 
         return f"[Expert] Badge awarded to users: {users_awarded} with the highest score: {highest_score} for quest: {quest.name}"
 
@@ -332,8 +457,7 @@ def award_tutorial_attendance_badges_for_course(course_id):
         if not course_groups.exists():
             return f"[Tutorial Attendance] No course groups found for course: {course_id}"
 
-        full_badge = Badge.objects.get(name="Full Attendance")
-        half_badge = Badge.objects.get(name="Half Attendance")
+        badge_ids = {name: get_badge_id(name) for name in ("Full Attendance", "Half Attendance")}
 
         for course_group in course_groups:
             tutorial_quests = Quest.objects.filter(course_group=course_group).exclude(type="Private").filter(
@@ -343,7 +467,8 @@ def award_tutorial_attendance_badges_for_course(course_id):
             if total_tutorials == 0:
                 continue
 
-            enrollments = UserCourseGroupEnrollment.objects.filter(course_group=course_group)
+            enrollments = UserCourseGroupEnrollment.objects.filter(course_group=course_group).select_related('student')
+            enrollments_by_badge = {name: [] for name in badge_ids}
             for enrollment in enrollments:
                 completed_tutorials = UserQuestAttempt.objects.filter(
                     student=enrollment.student,
@@ -353,18 +478,16 @@ def award_tutorial_attendance_badges_for_course(course_id):
 
                 ratio = completed_tutorials / total_tutorials
                 if ratio >= 0.7:
-                    badge = full_badge
+                    badge_name = "Full Attendance"
                 elif ratio > 0.5 and ratio < 0.7:
-                    badge = half_badge
+                    badge_name = "Half Attendance"
                 else:
                     continue
+                enrollments_by_badge[badge_name].append(enrollment)
 
-                user_course_badge, created = UserCourseBadge.objects.get_or_create(
-                    badge=badge,
-                    user_course_group_enrollment=enrollment
-                )
-                if created:
-                    award_badge_points(enrollment.student, badge.name)
+            for badge_name, badge_enrollments in enrollments_by_badge.items():
+                for enrollment in create_missing_badges(UserCourseBadge, badge_ids[badge_name], 'user_course_group_enrollment', badge_enrollments):
+                    award_badge_points(enrollment.student, badge_name)
 
         return f"[Tutorial Attendance] Awarded tutorial badges for course: {course_id}"
     except Badge.DoesNotExist:
@@ -413,7 +536,7 @@ def award_top_ranker_badge(course_id):
         if not course_groups.exists():
             return f"[Top Ranker] No course groups found for course: {course_id}"
 
-        top_ranker_badge = Badge.objects.get(name="Top Ranker")
+        top_ranker_badge_id = get_badge_id("Top Ranker")
 
         for course_group in course_groups:
             student_scores = defaultdict(float)
@@ -422,14 +545,15 @@ def award_top_ranker_badge(course_id):
 
             quests = Quest.objects.filter(course_group=course_group)
 
+            # Stream only the score columns through a server-side cursor instead of loading every attempt
             quest_attempts = UserQuestAttempt.objects.filter(
                 quest__in=quests,
                 student__in=[e.student for e in enrollments]
-            )
+            ).values_list('student_id', 'total_score_achieved')
 
-            for attempt in quest_attempts:
-                student_scores[attempt.student_id] += (
-                    attempt.total_score_achieved or 0
+            for student_id, total_score_achieved in quest_attempts.iterator(chunk_size=SCORE_ITERATOR_CHUNK_SIZE):
+                student_scores[student_id] += (
+                    total_score_achieved or 0
                 )
             
             tests = TestScore.objects.filter(course_group=course_group)
@@ -437,17 +561,17 @@ def award_top_ranker_badge(course_id):
             test_scores = UserTestScore.objects.filter(
                 test__in=tests,
                 student__in=[e.student for e in enrollments]
-            ).select_related("test")
+            ).values_list('student_id', 'score', 'test__weightage')
 
-            for test_score in test_scores:
-                weightage = test_score.test.weightage or 0
+            for student_id, score, weightage in test_scores.iterator(chunk_size=SCORE_ITERATOR_CHUNK_SIZE):
+                weightage = weightage or 0
 
                 weighted_score = (
-                    (test_score.score or 0)
+                    (score or 0)
                     * (weightage / 100)
                 )
 
-                student_scores[test_score.student_id] += weighted_score
+                student_scores[student_id] += weighted_score
 
             if not student_scores:
                 return f"[Top Ranker] No attempts with the highest score for course: {course_id}"
@@ -465,7 +589,7 @@ def award_top_ranker_badge(course_id):
 
             for top_student in top_rankering_students:
                 user_course_badge, created = UserCourseBadge.objects.get_or_create(
-                    badge=top_ranker_badge,
+                    badge_id=top_ranker_badge_id,
                     user_course_group_enrollment=top_student
                 )
                 if created:
@@ -486,17 +610,16 @@ def award_consecutive_30days_badge(user_id):
     """
     from .models import EduquestUser, UserOtherBadge, Badge
     try:
-        print(user_id)
         user = EduquestUser.objects.get(id=user_id)
 
         if user.daily_checkin_streak < 30:
             return f"[Consecutive 30 days] Skipping user: {user.username}"
 
-        badge = Badge.objects.get(name="Consecutive 30 Days")
-        logger.info(f"[Consecutive 30 days] {user.username} has logged in for 30 days")
+        badge_id = get_badge_id("Consecutive 30 Days")
+        logger.info("[Consecutive 30 days] %s has logged in for 30 days", user.username)
 
         user_other_badge, created = UserOtherBadge.objects.get_or_create(
-            badge=badge,
+            badge_id=badge_id,
             user_id=user
         )
         if created:
@@ -520,11 +643,11 @@ def award_semester_badge(user_id):
         if user.daily_checkin_streak < 84:
             return f"[Semester] Skipping user cosmetic: {user.username}"
 
-        badge = Badge.objects.get(name="Semester")
-        logger.info(f"[Semester] {user.username} has logged in for 84 days")
+        badge_id = get_badge_id("Semester")
+        logger.info("[Semester] %s has logged in for 84 days", user.username)
 
         user_other_badge, created = UserOtherBadge.objects.get_or_create(
-            badge=badge,
+            badge_id=badge_id,
             user_id=user
         )
         if created:
@@ -548,11 +671,11 @@ def award_hoarder_badge(user_id):
         if userCosmetics.owns == None or userCosmetics.owns.count() < 10:
             return f"[Hoarder] Skipping user cosmetic: {userCosmetics.user.username}"
 
-        badge = Badge.objects.get(name="Hoarder")
-        logger.info(f"[Hoarder] {userCosmetics.user.username} bought at least 10 cosmetic")
+        badge_id = get_badge_id("Hoarder")
+        logger.info("[Hoarder] %s bought at least 10 cosmetic", userCosmetics.user.username)
 
         user_other_badge, created = UserOtherBadge.objects.get_or_create(
-            badge=badge,
+            badge_id=badge_id,
             user_id=userCosmetics.user
         )
         if created:
@@ -563,6 +686,43 @@ def award_hoarder_badge(user_id):
     except Badge.DoesNotExist:
         return f"[Hoarder] Badge 'Hoarder' does not exist."
     
+def award_completionist_badges(user_course_group_enrollments):
+    """
+    Mark the enrollments whose student submitted every non-private quest of the course group as completed
+    and issue them the "Completionist" badge, with one SELECT, one UPDATE and one bulk INSERT.
+    Returns the usernames of the completed enrollments.
+    """
+    from .models import UserQuestAttempt, Quest, UserCourseGroupEnrollment, UserCourseBadge
+
+    # Count the group's non-private quests and the student's submitted ones in the same query;
+    # an enrollment is complete when both counts match
+    quests_in_group = Quest.objects.filter(
+        course_group=OuterRef('course_group')
+    ).exclude(type="Private").order_by().values('course_group')
+    submitted_quests = UserQuestAttempt.objects.filter(
+        student=OuterRef('student'),
+        quest__course_group=OuterRef('course_group'),
+        submitted=True
+    ).exclude(quest__type="Private").order_by().values('student')
+    completed_enrollments = list(
+        user_course_group_enrollments.annotate(
+            total_quests=Coalesce(Subquery(quests_in_group.annotate(total=Count('id')).values('total')), 0),
+            submitted_quests=Coalesce(Subquery(submitted_quests.annotate(total=Count('quest', distinct=True)).values('total')), 0)
+        ).filter(total_quests__gt=0, total_quests=F('submitted_quests')).select_related('student')
+    )
+
+    if completed_enrollments:
+        UserCourseGroupEnrollment.objects.filter(
+            id__in=[enrollment.id for enrollment in completed_enrollments]
+        ).update(completed_on=timezone.now())
+
+        # Award the "Completionist" badge
+        badge_id = get_badge_id("Completionist")
+        for enrollment in create_missing_badges(UserCourseBadge, badge_id, 'user_course_group_enrollment', completed_enrollments):
+            award_badge_points(enrollment.student, "Completionist")
+
+    return [enrollment.student.username for enrollment in completed_enrollments]
+
 @shared_task
 def check_course_completion_and_award_completionist_badge(course_id):
     """
@@ -571,8 +731,7 @@ def check_course_completion_and_award_completionist_badge(course_id):
     and issue the "Completionist" badge.
     Triggered after a course status is changed from Active to Expired.
     """
-    from django.utils import timezone
-    from .models import UserQuestAttempt, Quest, UserCourseGroupEnrollment, Badge, UserCourseBadge
+    from .models import UserCourseGroupEnrollment
     try:
 
         user_course_group_enrollments = UserCourseGroupEnrollment.objects.filter(course_group__course_id=course_id)
@@ -580,176 +739,165 @@ def check_course_completion_and_award_completionist_badge(course_id):
         if not user_course_group_enrollments.exists():
             return f"[Course Completion Check] No user enrollments found for course: {course_id}"
 
-        awarded_users = []
-        for user_course_group_enrollment in user_course_group_enrollments:
-            course_group = user_course_group_enrollment.course_group
-            user = user_course_group_enrollment.student
-
-            # Get all non-private quests under the course group
-            quests_in_group = Quest.objects.filter(
-                course_group=course_group
-            ).exclude(type="Private")
+        awarded_users = award_completionist_badges(user_course_group_enrollments)
 
-            # Check if there are any quests to complete
-            if not quests_in_group.exists():
-                logger.info(f"[Course Completion Check] No quests found in course group {course_group.name}")
-                continue
+        return f"[Course Completion Check] Badge awarded to users: {awarded_users} for completing course: {course_id}"
 
-            # Get IDs of all quests in the course group
-            quests_in_group_ids = set(quests_in_group.values_list('id', flat=True))
+    except UserCourseGroupEnrollment.DoesNotExist:
+        return f"[Course Completion Check] UserCourseGroupEnrollment with course id {course_id} does not exist."
 
-            # Get IDs of quests the user has submitted attempts for
-            user_attempts_in_group = set(
-                UserQuestAttempt.objects.filter(
-                    student=user,
-                    quest__in=quests_in_group,
-                    submitted=True
-                ).values_list('quest_id', flat=True)
+@shared_task
+def check_all_course_completions():
+    """
+    Sweep the not yet completed enrollments of every expired course in one pass
+    and issue the "Completionist" badge to those who submitted all their quests.
+    Runs nightly to catch completions the per-course check missed.
+    """
+    from .models import Badge, UserCourseGroupEnrollment
+    try:
+        awarded_users = award_completionist_badges(
+            UserCourseGroupEnrollment.objects.filter(
+                completed_on__isnull=True,
+                course_group__course__status='Expired'
             )
-            # Check if the user has submitted attempts for all quests
-            if quests_in_group_ids == user_attempts_in_group:
-                # User has completed all quests
-                user_course_group_enrollment.completed_on = timezone.now()
-                user_course_group_enrollment.save()
-
-                # Award the "Completionist" badge
-                badge = Badge.objects.get(name="Completionist")
-                user_course_badge, created = UserCourseBadge.objects.get_or_create(
-                    badge=badge,
-                    user_course_group_enrollment=user_course_group_enrollment
-                )
-                if created:
-                    award_badge_points(user, "Completionist")
-                awarded_users.append(user_course_group_enrollment.student.username)
+        )
+        return f"[Course Completion Sweep] Badge awarded to users: {awarded_users}"
 
-        return f"[Course Completion Check] Badge awarded to users: {awarded_users} for completing course group: {course_group}"
+    except Badge.DoesNotExist:
+        return "[Course Completion Sweep] Badge 'Completionist' does not exist."
+
+def _feedback_request(user_quest_attempt):
+    """
+    Build the Flask endpoint and payload for a quest attempt from its prefetched answers.
+    Returns None when the attempt has no answers to give feedback on.
+    """
+    attempt_data = {
+        'student_id': user_quest_attempt.student_id,
+        'quest_id': user_quest_attempt.quest_id,
+        'answers': []
+    }
+
+    question = None
+    if user_quest_attempt.short_attempts:
+        for short_answer_attempt in user_quest_attempt.short_attempts:
+            question = short_answer_attempt.question
+
+            attempt_data['answers'].append({
+                'question_id': question.id,
+                'question_text': question.text,
+                'cognitive_level': getattr(question, 'cognitive_level', 'Understand'),
+                'topic': getattr(question, 'topic', 'General'),
+                'answer': short_answer_attempt.text,
+                'score_achieved': short_answer_attempt.score_achieved,
+                'explanation': short_answer_attempt.unstructuredanswer.reason
+            })
+    else:
+        for answer_attempt in user_quest_attempt.answer_attempts.all():
+            question = answer_attempt.question
+            correct_answer = question.correct_answer
+
+            attempt_data['answers'].append({
+                'question_id': question.id,
+                'question_text': question.text,
+                'cognitive_level': getattr(question, 'cognitive_level', 'Understand'),
+                'topic': getattr(question, 'topic', 'General'),
+                'selected_answer': answer_attempt.answer.text,
+                'is_selected': answer_attempt.is_selected,
+                'answer_is_correct': answer_attempt.answer.is_correct,
+                'is_correct': answer_attempt.is_selected and answer_attempt.answer.is_correct,
+                'correct_answer': correct_answer.text if correct_answer else '',
+                'explanation': answer_attempt.answer.reason
+            })
+
+    if question is None:
+        return None
+
+    if question.question_type in ("short_ans", "latex_short_ans"):
+        return "/generate_shortans_feedback", attempt_data
+    return "/generate_feedback", attempt_data
 
-    except UserCourseGroupEnrollment.DoesNotExist:
-        return f"[Course Completion Check] UserCourseGroupEnrollment with course id {course_id} does not exist."
 
 @shared_task
-def generate_personalised_feedback(user_quest_attempt_id):
+def generate_personalised_feedback(score_context):
     """
     Generate personalised feedback using Flask microservice.
+    The attempt and its answers are loaded up front, the attempt is sent over the
+    pooled session, and the feedback is upserted in one INSERT.
     """
-    from .models import UserQuestAttempt
+    from django.db.models import Prefetch
+    from .models import Answer, UserQuestAttempt, UserAnswerAttempt, UserShortAnswerAttempt
 
-    try: 
-        user_quest_attempt = UserQuestAttempt.objects.get(id=user_quest_attempt_id)
+    user_quest_attempt_id = _from_score_context(score_context, 'attempt_id')
+    try:
+        user_quest_attempt = UserQuestAttempt.objects.select_related('student').prefetch_related(
+            Prefetch(
+                'short_answer_attempts',
+                queryset=UserShortAnswerAttempt.objects.select_related('question', 'unstructuredanswer'),
+                to_attr='short_attempts'
+            ),
+            # Each question's correct answers are fetched once for the whole attempt
+            Prefetch(
+                'answer_attempts',
+                queryset=UserAnswerAttempt.objects.select_related('question', 'answer').prefetch_related(
+                    Prefetch('question__answers', queryset=Answer.objects.filter(is_correct=True).order_by('id'), to_attr='correct_answers')
+                )
+            )
+        ).get(id=user_quest_attempt_id)
 
-        attempt_data = {
-            'student_id': user_quest_attempt.student.id,
-            'quest_id': user_quest_attempt.quest.id,
-            'answers': []
-        }
+        feedback_request = _feedback_request(user_quest_attempt)
+        if feedback_request is None:
+            logger.warning("[Feedback] Attempt %s has no answers, skipping", user_quest_attempt.id)
+            return
+        endpoint, attempt_data = feedback_request
 
-        # Call Flask microservice to generate feedback (OUTSIDE the loop)
         FLASK_URL = getattr(settings, 'FLASK_MICROSERVICE_URL', 'http://localhost:5000')
         logger.info("[Feedback] Calling Flask microservice at %s", FLASK_URL)
+        logger.info("[Feedback] Attempt %s payload answers=%s", user_quest_attempt.id, len(attempt_data['answers']))
 
-        if user_quest_attempt.short_answer_attempts.all():
-            for short_answer_attempt in user_quest_attempt.short_answer_attempts.all():
-                question = short_answer_attempt.question
-                
-                attempt_data['answers'].append({
-                    'question_id': question.id,
-                    'question_text': question.text,
-                    'cognitive_level': getattr(question, 'cognitive_level', 'Understand'),
-                    'topic': getattr(question, 'topic', 'General'),
-                    'answer': short_answer_attempt.text,
-                    'score_achieved': short_answer_attempt.score_achieved,
-                    'explanation': short_answer_attempt.unstructuredanswer.reason
-                })
-        else:
-            # Collect all answer attempts
-            for answer_attempt in user_quest_attempt.answer_attempts.all():
-                question = answer_attempt.question
-                correct_answer = question.answers.filter(is_correct=True).first()
-                
-                attempt_data['answers'].append({
-                    'question_id': question.id,
-                    'question_text': question.text,
-                    'cognitive_level': getattr(question, 'cognitive_level', 'Understand'),
-                    'topic': getattr(question, 'topic', 'General'),
-                    'selected_answer': answer_attempt.answer.text,
-                    'is_selected': answer_attempt.is_selected,
-                    'answer_is_correct': answer_attempt.answer.is_correct,
-                    'is_correct': answer_attempt.is_selected and answer_attempt.answer.is_correct,
-                    'correct_answer': correct_answer.text if correct_answer else '',
-                    'explanation': answer_attempt.answer.reason
-                })
-
-        logger.info("[Feedback] Attempt %s payload answers=%s", user_quest_attempt_id, len(attempt_data.get('answers', [])))
-        
-        if question.question_type == "short_ans" and question.question_type == "latex_short_ans":
-            response = requests.post(
-                f"{FLASK_URL}/generate_shortans_feedback",
-                json=attempt_data,
-                timeout=30
-            )
-            logger.info("[Feedback] Flask response status=%s", response.status_code)
-
-            if response.status_code == 200:
-                feedback_data = response.json()
-
-                StudentFeedback.objects.update_or_create(
-                    user_quest_attempt=user_quest_attempt,
-                    defaults={
-                        'quest_summary': feedback_data.get('quest_summary', {}),
-                        'subtopic_feedback': feedback_data.get('subtopic_feedback', []),
-                        'study_tips': feedback_data.get('study_tips', []),
-                        'strengths': feedback_data.get('strengths', []),
-                        'weaknesses': feedback_data.get('weaknesses', []),
-                        'recommendations': feedback_data.get('recommendations', ''),
-                        'question_feedback': feedback_data.get('question_feedback', {})
-                    }
-                )
-                
-                print(f"[Feedback Generated] for {user_quest_attempt.student.username}")
-            else:
-                logger.error("[Feedback] Flask error status=%s body=%s", response.status_code, response.text[:500])
-                print(f"[Feedback Error] Status: {response.status_code}")
-        else:
-            response = requests.post(
-                f"{FLASK_URL}/generate_feedback",
-                json=attempt_data,
-                timeout=30
-            )
-            logger.info("[Feedback] Flask response status=%s", response.status_code)
-
-            if response.status_code == 200:
-                feedback_data = response.json()
-
-                StudentFeedback.objects.update_or_create(
-                    user_quest_attempt=user_quest_attempt,
-                    defaults={
-                        'quest_summary': feedback_data.get('quest_summary', {}),
-                        'subtopic_feedback': feedback_data.get('subtopic_feedback', []),
-                        'study_tips': feedback_data.get('study_tips', []),
-                        'strengths': feedback_data.get('strengths', []),
-                        'weaknesses': feedback_data.get('weaknesses', []),
-                        'recommendations': feedback_data.get('recommendations', ''),
-                        'question_feedback': feedback_data.get('question_feedback', {})
-                    }
-                )
-                
-                print(f"[Feedback Generated] for {user_quest_attempt.student.username}")
-            else:
-                logger.error("[Feedback] Flask error status=%s body=%s", response.status_code, response.text[:500])
-                print(f"[Feedback Error] Status: {response.status_code}")
+        response = flask_session.post(
+            f"{FLASK_URL}{endpoint}",
+            data=FLASK_JSON_ENCODER.encode(attempt_data).encode('utf-8'),
+            headers=FLASK_JSON_HEADERS,
+            timeout=FLASK_TIMEOUT
+        )
+        logger.info("[Feedback] Flask response status=%s", response.status_code)
 
+        if response.status_code != 200:
+            logger.error("[Feedback] Flask error status=%s body=%s", response.status_code, response.text[:500])
+            return
+
+        feedback_data = response.json()
+        feedback = StudentFeedback(user_quest_attempt=user_quest_attempt)
+        feedback.quest_summary = feedback_data.get('quest_summary', {})
+        feedback.subtopic_feedback = feedback_data.get('subtopic_feedback', [])
+        feedback.study_tips = feedback_data.get('study_tips', [])
+        feedback.strengths = feedback_data.get('strengths', [])
+        feedback.weaknesses = feedback_data.get('weaknesses', [])
+        feedback.recommendations = feedback_data.get('recommendations', '')
+        feedback.question_feedback = feedback_data.get('question_feedback', {})
+
+        # Regenerated feedback replaces the existing row of the attempt
+        StudentFeedback.objects.bulk_create(
+            [feedback],
+            update_conflicts=True,
+            unique_fields=['user_quest_attempt'],
+            update_fields=['payload']
+        )
+        logger.info("[Feedback Generated] for %s", user_quest_attempt.student.username)
+
+    except UserQuestAttempt.DoesNotExist:
+        logger.error("[Feedback] UserQuestAttempt %s does not exist", user_quest_attempt_id)
     except requests.RequestException as e:
         logger.exception("[Feedback] Request failed: %s", str(e))
-        print(f"[Error Generating Feedback]: {str(e)}")
     except Exception as e:
         logger.exception("[Feedback] Unexpected error: %s", str(e))
-        print(f"[Error Generating Feedback]: {str(e)}")
 
 @shared_task
-def update_cognitive_profile(student_id):
+def update_cognitive_profile(score_context):
     """
     Update student's cognitive profile based on all quest attempts
     """
+    student_id = _from_score_context(score_context, 'student_id')
 
     try:  
         student = EduquestUser.objects.get(id=student_id)
@@ -757,41 +905,22 @@ def update_cognitive_profile(student_id):
         # Get or create cognitive profile
         profile, created = StudentCognitiveProfile.objects.get_or_create(student=student)
 
-        # Analyze all submitted quest attempts
-        all_attempts = UserQuestAttempt.objects.filter(
-            student=student,
-            submitted=True
+        # Analyze the answers of all submitted quest attempts, bucketed by cognitive level and by topic in SQL
+        answer_attempts = UserAnswerAttempt.objects.filter(
+            user_quest_attempt__student=student,
+            user_quest_attempt__submitted=True
         )
+        counts = {'total': Count('id'), 'correct': Count('id', filter=Q(is_correct=True))}
 
         # Calculate accuracy per cognitive level
-        level_stats = {}
-        topic_stats = {}
-
-        for attempt in all_attempts:
-            for answer_attempt in attempt.answer_attempts.all():
-                question = answer_attempt.question
-
-                # Track by cognitive level
-                level = getattr(question, 'cognitive_level', 'Understand')
-                if level not in level_stats: 
-                    level_stats[level] = {
-                        'total': 0,
-                        'correct': 0
-                    }
-                level_stats[level]['total'] += 1
-                if answer_attempt.is_correct:
-                    level_stats[level]['correct'] += 1
-
-                # Track by topic
-                topic = getattr(question, 'topic', 'General')
-                if topic not in topic_stats:
-                    topic_stats[topic] = {
-                        'total': 0,
-                        'correct': 0
-                    }
-                topic_stats[topic]['total'] += 1
-                if answer_attempt.is_correct:
-                    topic_stats[topic]['correct'] += 1
+        level_stats = {
+            row['question__cognitive_level']: {'total': row['total'], 'correct': row['correct']}
+            for row in answer_attempts.values('question__cognitive_level').annotate(**counts).order_by()
+        }
+        topic_stats = {
+            row['question__topic']: {'total': row['total'], 'correct': row['correct']}
+            for row in answer_attempts.values('question__topic').annotate(**counts).order_by()
+        }
 
         # Update profile accurately (with division by zero protection)
         profile.remember_accuracy = (level_stats.get('Remember', {}).get('correct', 0) / max(level_stats.get('Remember', {}).get('total', 1), 1)) * 100
@@ -826,10 +955,10 @@ def update_cognitive_profile(student_id):
             profile.recommend_difficulty = 3.0
 
         profile.save()
-        print(f"[Cognitive Profile Updated] {student.username} - {profile.competency_level}")
+        logger.info("[Cognitive Profile Updated] %s - %s", student.username, profile.competency_level)
 
     except Exception as e:
-        print(f"[Error Updating Cognitive Profile]: {str(e)}")
+        logger.exception("[Error Updating Cognitive Profile]: %s", str(e))
 
 @shared_task
 def award_level_border(user_id):
@@ -848,12 +977,50 @@ def award_level_border(user_id):
         try:
             frame = Cosmetic.objects.get(name=f"Level {userLevel} Frame")
             userCosmetics.owns.add(frame)
-            logger.info(f"[Level Border] {userCosmetics.user.username} is at {userLevel} level")
+            logger.info("[Level Border] %s is at %s level", userCosmetics.user.username, userLevel)
         except:
             # When user level exceeds border available/if some level does not include border
-            logger.info(f"[Level Border] {userCosmetics.user.username} is at {userLevel} level and there are no borders")
+            logger.info("[Level Border] %s is at %s level and there are no borders", userCosmetics.user.username, userLevel)
 
         return f"[Level Border] Cosmetic frame awarded to user: {userCosmetics.user.username}"
 
     except Cosmetic.DoesNotExist:
-        return f"[Level Border] Cosmetic frame does not exist."
\ No newline at end of file
+        return f"[Level Border] Cosmetic frame does not exist."
+@shared_task
+def finalize_document_upload(document_id):
+    """
+    Verify that an uploaded document exists in storage and mark it ready (or error).
+    Triggered after a new document is saved.
+    """
+    from .models import Document
+    document = Document.objects.filter(id=document_id).first()
+    if document is None:
+        return f"[Document Upload] Document {document_id} does not exist."
+
+    try:
+        upload_state = 'ready' if document.file.storage.exists(document.file.name) else 'error'
+    except Exception as e:
+        logger.error("[Document Upload] Could not verify %s: %s", document.file.name, e)
+        upload_state = 'error'
+
+    Document.objects.filter(id=document_id).update(upload_state=upload_state)
+    return f"[Document Upload] Document {document_id} is {upload_state}"
+
+
+@shared_task
+def retry_pending_document_uploads():
+    """
+    Verify again the documents still pending after DOCUMENT_PENDING_RETRY_MINUTES,
+    for uploads whose finalize_document_upload task was lost or failed.
+    The oldest DOCUMENT_RETRY_BATCH_SIZE are dispatched as one group so the storage
+    checks run on the workers in parallel; the next run picks up the rest.
+    """
+    from .models import Document
+    stale_before = timezone.now() - timedelta(minutes=DOCUMENT_PENDING_RETRY_MINUTES)
+    document_ids = list(Document.objects.filter(
+        upload_state='pending',
+        uploaded_at__lt=stale_before
+    ).order_by('uploaded_at').values_list('id', flat=True)[:DOCUMENT_RETRY_BATCH_SIZE])
+    if document_ids:
+        group(finalize_document_upload.s(document_id) for document_id in document_ids).apply_async()
+    return f"[Document Upload] Dispatched {len(document_ids)} pending documents for verification"
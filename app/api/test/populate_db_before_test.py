@@ -1,3 +1,5 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_migrate
 from django.test.runner import DiscoverRunner
 from ..models import EduquestUser, Image, AcademicYear, Term, Course, CourseGroup
 
@@ -5,8 +7,18 @@ from ..models import EduquestUser, Image, AcademicYear, Term, Course, CourseGrou
 class PopulateDBBeforeTest(DiscoverRunner):
 
     def setup_databases(self, **kwargs):
-        # Call the super method to create the test databases first
-        result = super().setup_databases(**kwargs)
+        # Seed the test database from post_migrate, which create_test_db sends
+        # before Django serializes it and clones it for --parallel workers
+        post_migrate.connect(self.populate_database, dispatch_uid='populate_db_before_test')
+        try:
+            return super().setup_databases(**kwargs)
+        finally:
+            post_migrate.disconnect(dispatch_uid='populate_db_before_test')
+
+    def populate_database(self, app_config, using=DEFAULT_DB_ALIAS, **kwargs):
+        # Migrate also runs on --keepdb reruns, so get_or_create keeps the seed data unique
+        if app_config.label != 'api' or using != DEFAULT_DB_ALIAS:
+            return
 
         # Check if the superuser already exists
         if not EduquestUser.objects.filter(username='admin').exists():
@@ -19,42 +31,42 @@ class PopulateDBBeforeTest(DiscoverRunner):
             self.superuser = EduquestUser.objects.get(username='admin')
 
         # Create other necessary objects for testing
-        self.image = Image.objects.create(
+        self.image, _ = Image.objects.get_or_create(
             name="Test Image",
             filename="test_image.svg"
         )
 
-        self.private_year = AcademicYear.objects.create(
+        self.private_year, _ = AcademicYear.objects.get_or_create(
             start_year=0,
             end_year=0
         )
 
-        self.private_term = Term.objects.create(
+        self.private_term, _ = Term.objects.get_or_create(
             name="Private Term",
             academic_year=self.private_year,
         )
 
-        self.private_course = Course.objects.create(
+        self.private_course, _ = Course.objects.get_or_create(
             name="Private Course",
             term=self.private_term,
-            image=self.image,
-            type="Private",
-            status="Active",
-            description="Private Course Description",
+            defaults={
+                'image': self.image,
+                'type': "Private",
+                'status': "Active",
+                'description': "Private Course Description",
+            },
         )
 
         # Set the course coordinators
         self.private_course.coordinators.set([self.superuser])
 
         # Create a course group
-        self.private_course_group = CourseGroup.objects.create(
+        self.private_course_group, _ = CourseGroup.objects.get_or_create(
             name="Private Course Group",
-            instructor=self.superuser,
             course=self.private_course,
+            defaults={'instructor': self.superuser},
         )
 
-        return result
-
     def teardown_databases(self, old_config, **kwargs):
         # Optionally, clean up any additional resources if necessary
         return super().teardown_databases(old_config, **kwargs)
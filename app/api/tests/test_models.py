@@ -1,6 +1,7 @@
 from datetime import timedelta
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from unittest.mock import patch
@@ -21,7 +22,8 @@ from ..models import (
     Badge,
     UserQuestBadge,
     UserCourseBadge,
-    Document
+    Document,
+    get_badge_id
 )
 
 from .factory import (
@@ -175,19 +177,46 @@ class CourseModelTest(TestCase):
         expected_str = f"Term {self.term.name} - {self.course.code}"
         self.assertEqual(str(self.course), expected_str)
 
-    @patch('api.tasks.check_course_completion_and_award_completionist_badge.delay')
-    def test_save_trigger_tasks_on_status_change_to_expired(self, mock_task):
+    @patch('api.models.group')
+    def test_save_trigger_tasks_on_status_change_to_expired(self, mock_group):
         """
-        Test that the task is triggered when the course status is changed to Expired
+        Test that the course badge tasks are published together when the course status is changed to Expired
         """
         # Change status from Active to Expired
         self.course.status = "Expired"
         self.course.save()
-        # Assert that the task was called with the course ID
-        mock_task.assert_called_with(self.course.id)
+        # Assert that the tasks were dispatched with the course ID
+        signatures = mock_group.call_args[0][0]
+        self.assertEqual({signature.task for signature in signatures}, {
+            'api.tasks.check_course_completion_and_award_completionist_badge',
+            'api.tasks.award_tutorial_attendance_badges_for_course',
+            'api.tasks.award_top_ranker_badge',
+        })
+        self.assertEqual({signature.args for signature in signatures}, {(self.course.id,)})
+        mock_group.return_value.apply_async.assert_called_once()
 
-    @patch('api.tasks.check_course_completion_and_award_completionist_badge.delay')
-    def test_save_does_not_trigger_tasks_on_new_instance_with_expired_status(self, mock_task):
+    @patch('api.models.group')
+    def test_save_expires_active_quests_on_status_change_to_expired(self, mock_group):
+        """
+        Test that expiring a course expires its active quests and dispatches their badge tasks together
+        """
+        group = CourseGroupFactory(course=self.course)
+        active_quest = QuestFactory(course_group=group, status="Active", expiration_date=None)
+        expired_quest = QuestFactory(course_group=group, status="Expired")
+
+        self.course.status = "Expired"
+        self.course.save()
+
+        active_quest.refresh_from_db()
+        self.assertEqual(active_quest.status, "Expired")
+        self.assertIsNotNone(active_quest.expiration_date)
+        badge_signatures = mock_group.call_args[0][0][3:]
+        self.assertEqual({signature.args for signature in badge_signatures}, {(active_quest.id,)})
+        self.assertEqual(len(badge_signatures), 2)
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch('api.models.group')
+    def test_save_does_not_trigger_tasks_on_new_instance_with_expired_status(self, mock_group):
         """
         Test that the task is not triggered when a new course is created with status Expired
         """
@@ -202,8 +231,8 @@ class CourseModelTest(TestCase):
             image=self.image
         )
         course_new.coordinators.set([self.coordinator1])
-        # Assert that the task was not called with the new course ID
-        mock_task.assert_not_called()
+        # Assert that no tasks were dispatched for the new course
+        mock_group.assert_not_called()
 
     def test_total_students_enrolled(self):
         """
@@ -237,6 +266,7 @@ class CourseModelTest(TestCase):
             student=student2,
             course_group=group2
         )
+        self.course.refresh_from_db()
         self.assertEqual(self.course.total_students_enrolled(), 2)
 
 
@@ -279,8 +309,21 @@ class CourseGroupModelTest(TestCase):
             student=student2,
             course_group=self.group
         )
+        self.group.refresh_from_db()
         self.assertEqual(self.group.total_students_enrolled(), 2)
 
+    def test_total_students_enrolled_after_unenrollment(self):
+        """
+        Test that removing an enrollment decrements the enrollment counters of the group and course
+        """
+        enrollment = UserCourseGroupEnrollmentFactory(course_group=self.group)
+        UserCourseGroupEnrollmentFactory(course_group=self.group)
+        enrollment.delete()
+        self.group.refresh_from_db()
+        self.course.refresh_from_db()
+        self.assertEqual(self.group.total_students_enrolled(), 1)
+        self.assertEqual(self.course.total_students_enrolled(), 1)
+
 
 class UserCourseGroupEnrollmentModelTest(TestCase):
 
@@ -376,8 +419,38 @@ class QuestModelTest(TestCase):
             number=2,
             max_score=3
         )
+        self.quest.refresh_from_db()
         self.assertEqual(self.quest.total_max_score(), 5)
 
+    def test_total_max_score_after_question_edit_and_delete(self):
+        """
+        Test that the cached totals follow question max_score edits and deletions
+        """
+        question1 = QuestionFactory(quest=self.quest, max_score=2)
+        question2 = QuestionFactory(quest=self.quest, max_score=3)
+        question1.max_score = 4
+        question1.save()
+        question2.delete()
+        self.quest.refresh_from_db()
+        self.assertEqual(self.quest.total_max_score(), 4)
+        self.assertEqual(self.quest.total_questions(), 1)
+
+    def test_totals_follow_question_moved_to_another_quest(self):
+        """
+        Test that moving a question updates the cached totals of both quests
+        """
+        other_quest = QuestFactory()
+        question = QuestionFactory(quest=self.quest, max_score=2)
+        QuestionFactory(quest=self.quest, max_score=3)
+        question.quest = other_quest
+        question.save()
+        self.quest.refresh_from_db()
+        other_quest.refresh_from_db()
+        self.assertEqual(self.quest.total_max_score(), 3)
+        self.assertEqual(self.quest.total_questions(), 1)
+        self.assertEqual(other_quest.total_max_score(), 2)
+        self.assertEqual(other_quest.total_questions(), 1)
+
     def test_total_questions(self):
         """
         Test that the total_questions method returns the correct number of questions
@@ -389,27 +462,30 @@ class QuestModelTest(TestCase):
             number=1,
             max_score=2
         )
+        self.quest.refresh_from_db()
         self.assertEqual(self.quest.total_questions(), 1)
 
-    @patch('api.tasks.award_speedster_badge.delay')
-    @patch('api.tasks.award_expert_badge.delay')
-    def test_save_trigger_tasks_on_status_change_to_expired(self, mock_expert_badge, mock_speedster_badge):
+    @patch('api.models.group')
+    def test_save_trigger_tasks_on_status_change_to_expired(self, mock_group):
         """
         Test that the tasks are triggered when the quest status is changed to Expired
         """
         # Change status from Active to Expired
         self.quest.status = "Expired"
         self.quest.save()
-        # Assert that both tasks were called with the quest ID
-        mock_expert_badge.assert_called_with(self.quest.id)
-        mock_speedster_badge.assert_called_with(self.quest.id)
+        # Assert that both tasks were published together with the quest ID
+        expert_signature, speedster_signature = mock_group.call_args[0]
+        self.assertEqual(expert_signature.task, 'api.tasks.award_expert_badge')
+        self.assertEqual(speedster_signature.task, 'api.tasks.award_speedster_badge')
+        self.assertEqual(expert_signature.args, (self.quest.id,))
+        self.assertEqual(speedster_signature.args, (self.quest.id,))
+        mock_group.return_value.apply_async.assert_called_once()
         # Check if expiration_date is set to now
         self.quest.refresh_from_db()
         self.assertIsNotNone(self.quest.expiration_date)
 
-    @patch('api.tasks.award_speedster_badge.delay')
-    @patch('api.tasks.award_expert_badge.delay')
-    def test_save_trigger_tasks_on_new_instance_with_expired_status(self, mock_expert_badge, mock_speedster_badge):
+    @patch('api.models.group')
+    def test_save_trigger_tasks_on_new_instance_with_expired_status(self, mock_group):
         """
         Test that the tasks are not triggered when a new quest is created with status Expired
         """
@@ -427,8 +503,7 @@ class QuestModelTest(TestCase):
             image=self.image
         )
         # Assert that tasks were not called for a new quest with status Expired
-        mock_expert_badge.assert_not_called()
-        mock_speedster_badge.assert_not_called()
+        mock_group.assert_not_called()
         # Check if expiration_date is set to now
         quest_new.refresh_from_db()
         self.assertIsNotNone(quest_new.expiration_date)
@@ -448,6 +523,18 @@ class QuestionModelTest(TestCase):
         expected_str = f"{self.question.number} from Quest ID {self.quest.id}"
         self.assertEqual(str(self.question), expected_str)
 
+    def test_correct_answer_is_cached(self):
+        """
+        Test that correct_answer looks the answer up once and then reuses it
+        """
+        AnswerFactory(question=self.question, is_correct=False)
+        correct = AnswerFactory(question=self.question, is_correct=True)
+        question = Question.objects.get(id=self.question.id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(question.correct_answer, correct)
+            self.assertEqual(question.correct_answer, correct)
+
 
 class AnswerModelTest(TestCase):
 
@@ -533,6 +620,53 @@ class UserQuestAttemptModelTest(TestCase):
             else:
                 self.assertEqual(ua.score_achieved, 0)
 
+    def test_calculate_total_score_achieved_with_hint_penalty(self):
+        """
+        Test that correct options share the max score and a used hint deducts 5 from the question's scored options
+        """
+        question = Question.objects.create(quest=self.quest, text="Pick the primes", number=1, max_score=10)
+        correct_one = Answer.objects.create(question=question, text="2", is_correct=True)
+        correct_two = Answer.objects.create(question=question, text="3", is_correct=True)
+        incorrect = Answer.objects.create(question=question, text="4", is_correct=False)
+        first = UserAnswerAttempt.objects.create(
+            user_quest_attempt=self.attempt, question=question, answer=correct_one, is_selected=True, hint_used=True
+        )
+        second = UserAnswerAttempt.objects.create(
+            user_quest_attempt=self.attempt, question=question, answer=correct_two, is_selected=True
+        )
+        wrong = UserAnswerAttempt.objects.create(
+            user_quest_attempt=self.attempt, question=question, answer=incorrect, is_selected=True
+        )
+
+        self.assertEqual(self.attempt.calculate_total_score_achieved(), 5)
+        for ua, expected in [(first, 0), (second, 5), (wrong, 0)]:
+            ua.refresh_from_db()
+            self.assertEqual(ua.score_achieved, expected)
+
+    def test_points_for_score_change_counts_improvement_only(self):
+        """
+        Test that points cover only the improvement over the best other submitted attempt and are never negative
+        """
+        UserQuestAttempt.objects.create(student=self.student, quest=self.quest, submitted=True, total_score_achieved=3)
+        self.attempt.total_score_achieved = 2
+        self.assertEqual(self.attempt.points_for_score_change(0), 0)
+        self.attempt.total_score_achieved = 5
+        self.assertEqual(self.attempt.points_for_score_change(0), 2)
+        self.assertEqual(self.attempt.points_for_score_change(4), 1)
+        self.attempt.total_score_achieved = 1
+        self.assertEqual(self.attempt.points_for_score_change(5), 0)
+
+    def test_saving_score_does_not_issue_points(self):
+        """
+        Test that saving a score directly, as a regrade does, leaves the student's points alone
+        """
+        UserQuestAttempt.objects.filter(pk=self.attempt.pk).update(submitted=True)
+        self.attempt.refresh_from_db()
+        self.attempt.total_score_achieved = 3
+        self.attempt.save(update_fields=['total_score_achieved'])
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.total_points, 0)
+
     def test_time_taken_property(self):
         """
         Test that the time_taken property returns the correct time taken in milliseconds
@@ -543,22 +677,23 @@ class UserQuestAttemptModelTest(TestCase):
         # Time taken should be approximately 600000 milliseconds (10 minutes)
         self.assertAlmostEqual(self.attempt.time_taken, 600000, delta=1000)
 
-    @patch('api.tasks.award_first_attempt_badge.delay')
-    @patch('api.tasks.calculate_score_and_issue_points.delay')
-    def test_save_trigger_tasks_on_submission(self, mock_score_task, mock_badge_task):
+    @patch('api.models.chain')
+    def test_save_trigger_tasks_on_submission(self, mock_chain):
         """
         Test that the tasks are triggered when the attempt is submitted
         """
         # Submit the attempt
         self.attempt.submitted = True
         self.attempt.save()
-        # Assert that both tasks were called with the attempt ID
-        mock_score_task.assert_called_with(self.attempt.id)
-        mock_badge_task.assert_called_with(self.attempt.id)
+        # Assert that the score task heads the chain with the attempt ID
+        mock_chain.assert_called_once()
+        score_signature = mock_chain.call_args[0][0]
+        self.assertEqual(score_signature.task, 'api.tasks.calculate_score_and_issue_points')
+        self.assertEqual(score_signature.args, (self.attempt.id,))
+        mock_chain.return_value.apply_async.assert_called_once()
 
-    @patch('api.tasks.award_first_attempt_badge.delay')
-    @patch('api.tasks.calculate_score_and_issue_points.delay')
-    def test_save_trigger_tasks_on_new_submission(self, mock_score_task, mock_badge_task):
+    @patch('api.models.chain')
+    def test_save_trigger_tasks_on_new_submission(self, mock_chain):
         """
         Test that the tasks are not triggered when a new attempt is created with submitted=True
         """
@@ -569,8 +704,7 @@ class UserQuestAttemptModelTest(TestCase):
             submitted=True
         )
         # Assert that tasks were not called for a new attempt with submitted=True
-        mock_score_task.assert_not_called()
-        mock_badge_task.assert_not_called()
+        mock_chain.assert_not_called()
 
 
 class UserAnswerAttemptModelTest(TestCase):
@@ -603,6 +737,54 @@ class UserAnswerAttemptModelTest(TestCase):
         """
         self.assertEqual(self.user_answer_attempt.score_achieved, 0)
 
+    def test_duplicate_answer_attempt_rejected(self):
+        """
+        Test that the same answer cannot be recorded twice for a question within one quest attempt
+        """
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserAnswerAttemptFactory(
+                user_quest_attempt=self.attempt,
+                question=self.question,
+                answer=self.answer1,
+            )
+
+    def test_is_correct_derived_from_selection_and_answer(self):
+        """
+        Test that is_correct is only set when the student selected a correct answer
+        """
+        self.assertTrue(self.user_answer_attempt.is_correct)
+        wrong_attempt = UserAnswerAttemptFactory(
+            user_quest_attempt=self.attempt,
+            question=self.question,
+            answer=self.answer2,
+            is_selected=True
+        )
+        self.assertFalse(wrong_attempt.is_correct)
+
+        other_attempt = UserQuestAttemptFactory(quest=self.quest, student=self.student)
+        unselected = UserAnswerAttemptFactory(
+            user_quest_attempt=other_attempt,
+            question=self.question,
+            answer=self.answer1,
+            is_correct=True
+        )
+        self.assertFalse(unselected.is_correct)
+
+        # Deselecting the answer on a later save clears is_correct
+        self.user_answer_attempt.is_selected = False
+        self.user_answer_attempt.save()
+        self.user_answer_attempt.refresh_from_db()
+        self.assertFalse(self.user_answer_attempt.is_correct)
+
+    def test_is_correct_read_from_loaded_answer(self):
+        """
+        Test that saving with the answer already loaded doesn't query it again
+        """
+        attempt = UserAnswerAttempt.objects.select_related('answer').get(pk=self.user_answer_attempt.pk)
+        with self.assertNumQueries(1):
+            attempt.save()
+        self.assertTrue(attempt.is_correct)
+
     def test_score_achieved_after_calculation(self):
         """
         Test that the score_achieved field is set correctly after calculation
@@ -631,6 +813,32 @@ class BadgeModelTest(TestCase):
         """
         self.assertEqual(str(self.badge), "Completionist Badge")
 
+    def test_get_badge_id_is_cached_until_the_badge_changes(self):
+        """
+        Test that get_badge_id serves the cached id and looks the badge up again after it is deleted and recreated
+        """
+        self.assertEqual(get_badge_id("Completionist Badge"), self.badge.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_badge_id("Completionist Badge"), self.badge.id)
+
+        self.badge.delete()
+        with self.assertRaises(Badge.DoesNotExist):
+            get_badge_id("Completionist Badge")
+        recreated = BadgeFactory(name="Completionist Badge", image=self.image)
+        self.assertEqual(get_badge_id("Completionist Badge"), recreated.id)
+
+    def test_get_badge_id_forgets_the_old_name_after_a_rename(self):
+        """
+        Test that a renamed badge is no longer found under its cached old name
+        """
+        self.assertEqual(get_badge_id("Completionist Badge"), self.badge.id)
+
+        self.badge.name = "Finisher Badge"
+        self.badge.save()
+        with self.assertRaises(Badge.DoesNotExist):
+            get_badge_id("Completionist Badge")
+        self.assertEqual(get_badge_id("Finisher Badge"), self.badge.id)
+
     def test_badge_creation(self):
         """
         Test that the badge is created successfully with the correct attributes
@@ -722,6 +930,29 @@ class DocumentModelTest(TestCase):
         self.assertEqual(Document.objects.count(), 1)
         self.assertEqual(Document.objects.first().name, "Test Document")
 
+    def test_document_save_prefixes_uuid(self):
+        """
+        Test that a new upload is stored under a UUID-prefixed name
+        """
+        test_file = SimpleUploadedFile("testfile.txt", b"file_content", content_type="text/plain")
+        document = Document.objects.create(name="Test Document", file=test_file, size=10.0, uploaded_by=self.uploader_one)
+
+        prefix, file_name = document.file.name.split('/')[-2:]
+        self.assertEqual(file_name, "testfile.txt")
+        self.assertEqual(len(prefix), 32)
+
+    def test_document_save_finalizes_upload_on_commit(self):
+        """
+        Test that a new upload starts pending and is marked ready once the background check finds the file
+        """
+        test_file = SimpleUploadedFile("testfile.txt", b"file_content", content_type="text/plain")
+        with self.captureOnCommitCallbacks(execute=True):
+            document = Document.objects.create(name="Test Document", file=test_file, size=10.0, uploaded_by=self.uploader_one)
+            self.assertEqual(document.upload_state, 'pending')
+
+        document.refresh_from_db()
+        self.assertEqual(document.upload_state, 'ready')
+
     # @patch('api.models.AzureStorage')  # Ensure this path matches where AzureStorage is used in your models
     # def test_document_save_with_existing_file(self, mock_azure_storage):
     #     """
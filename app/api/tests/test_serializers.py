@@ -48,6 +48,7 @@ from .factory import (
     TermFactory,
     CourseFactory,
     CourseGroupFactory,
+    DocumentFactory,
     UserCourseGroupEnrollmentFactory,
     QuestFactory,
     QuestionFactory,
@@ -1315,3 +1316,14 @@ class UserQuestBadgeSerializerTest(TestCase):
         updated_badge = serializer.save()
         self.assertEqual(updated_badge.badge, new_badge)
 
+
+class DocumentSerializerTest(TestCase):
+
+    def test_pending_upload_keeps_file_url(self):
+        """
+        Test that a pending upload is serialized with its file URL and upload state.
+        """
+        document = DocumentFactory()
+        data = DocumentSerializer(document).data
+        self.assertEqual(data['upload_state'], 'pending')
+        self.assertTrue(data['file'])
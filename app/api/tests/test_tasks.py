@@ -1,20 +1,59 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from api.models import UserCourseBadge
-from api.tasks import award_tutorial_attendance_badges_for_course
+from api.models import (
+    Document,
+    EduquestUser,
+    Quest,
+    TestScore,
+    UserCourseBadge,
+    UserCourseGroupEnrollment,
+    UserQuestAttempt,
+    UserQuestBadge,
+    UserTestScore,
+)
+from api.tasks import (
+    award_expert_badge,
+    award_first_attempt_badge,
+    award_speedster_badge,
+    award_top_ranker_badge,
+    award_tutorial_attendance_badges_for_course,
+    calculate_score_and_issue_points,
+    check_all_course_completions,
+    check_course_completion_and_award_completionist_badge,
+    check_expired_quest,
+    finalize_document_upload,
+    retry_pending_document_uploads,
+)
 from api.tests.factory import (
+    AnswerFactory,
     BadgeFactory,
     CourseFactory,
     CourseGroupFactory,
+    DocumentFactory,
     ImageFactory,
     QuestFactory,
+    QuestionFactory,
+    UserAnswerAttemptFactory,
     UserCourseGroupEnrollmentFactory,
     UserQuestAttemptFactory,
 )
 
 
-class TutorialAttendanceBadgesTaskTest(TestCase):
+class BadgeTaskTestCase(TestCase):
+    def setUp(self):
+        # Badge ids are cached by name, forget the ones rolled back with each test
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+
+class TutorialAttendanceBadgesTaskTest(BadgeTaskTestCase):
     def test_awards_full_and_half_attendance_badges(self):
         course = CourseFactory()
         course_group = CourseGroupFactory(course=course)
@@ -45,11 +84,10 @@ class TutorialAttendanceBadgesTaskTest(TestCase):
             QuestFactory(course_group=course_group, type="Kahoot!", tutorial_date=timezone.now()),
         ]
 
-        for quest in tutorial_quests:
-            UserQuestAttemptFactory(student=student_full, quest=quest, submitted=True)
-
-        for quest in tutorial_quests[:2]:
-            UserQuestAttemptFactory(student=student_half, quest=quest, submitted=True)
+        UserQuestAttempt.objects.bulk_create(
+            [UserQuestAttempt(student=student_full, quest=quest, submitted=True) for quest in tutorial_quests]
+            + [UserQuestAttempt(student=student_half, quest=quest, submitted=True) for quest in tutorial_quests[:2]]
+        )
 
         award_tutorial_attendance_badges_for_course(course.id)
 
@@ -64,3 +102,278 @@ class TutorialAttendanceBadgesTaskTest(TestCase):
 
         self.assertTrue(full_badge_awarded)
         self.assertTrue(half_badge_awarded)
+
+
+class TopRankerBadgeTaskTest(BadgeTaskTestCase):
+    def test_awards_highest_combined_quest_and_weighted_test_score(self):
+        BadgeFactory(name="Top Ranker", type="Course")
+        course_group = CourseGroupFactory()
+        quest = QuestFactory(course_group=course_group)
+        quest_leader = UserCourseGroupEnrollmentFactory(course_group=course_group)
+        test_leader = UserCourseGroupEnrollmentFactory(course_group=course_group)
+        UserQuestAttemptFactory(student=quest_leader.student, quest=quest, total_score_achieved=10)
+        UserQuestAttemptFactory(student=test_leader.student, quest=quest, total_score_achieved=6)
+        test = TestScore.objects.create(course_group=course_group, name="Midterm", organiser=quest.organiser, weightage=50)
+        UserTestScore.objects.create(test=test, student=test_leader.student, score=10)
+
+        award_top_ranker_badge(course_group.course_id)
+
+        awarded_enrollment_ids = set(UserCourseBadge.objects.values_list('user_course_group_enrollment_id', flat=True))
+        self.assertEqual(awarded_enrollment_ids, {test_leader.id})
+
+
+class CheckExpiredQuestTaskTest(TestCase):
+    @patch('api.tasks.group')
+    def test_expires_overdue_active_quests_in_one_update(self, mock_group):
+        overdue = QuestFactory(status='Active', expiration_date=timezone.now() - timedelta(days=1))
+        upcoming = QuestFactory(status='Active', expiration_date=timezone.now() + timedelta(days=1))
+
+        result = check_expired_quest()
+
+        self.assertEqual(result, f"[Expired Quest Check] 1 expired quests: {[overdue.id]}")
+        self.assertEqual(Quest.objects.get(id=overdue.id).status, 'Expired')
+        self.assertEqual(Quest.objects.get(id=upcoming.id).status, 'Active')
+        self.assertEqual(len(mock_group.call_args.args[0]), 2)
+        mock_group.return_value.apply_async.assert_called_once()
+
+
+class CourseCompletionTaskTest(BadgeTaskTestCase):
+    def test_awards_completionist_badge_to_students_who_submitted_every_quest(self):
+        BadgeFactory(name="Completionist", type="Course")
+        course = CourseFactory()
+        course_group = CourseGroupFactory(course=course)
+        quests = [QuestFactory(course_group=course_group), QuestFactory(course_group=course_group)]
+        QuestFactory(course_group=course_group, type="Private")
+        complete = UserCourseGroupEnrollmentFactory(course_group=course_group)
+        partial = UserCourseGroupEnrollmentFactory(course_group=course_group)
+        for quest in quests:
+            UserQuestAttemptFactory(student=complete.student, quest=quest, submitted=True)
+            UserQuestAttemptFactory(student=complete.student, quest=quest, submitted=True)
+        UserQuestAttemptFactory(student=partial.student, quest=quests[0], submitted=True)
+        UserQuestAttemptFactory(student=partial.student, quest=quests[1], submitted=False)
+
+        check_course_completion_and_award_completionist_badge(course.id)
+
+        self.assertIsNotNone(UserCourseGroupEnrollment.objects.get(id=complete.id).completed_on)
+        self.assertIsNone(UserCourseGroupEnrollment.objects.get(id=partial.id).completed_on)
+        awarded_enrollment_ids = set(UserCourseBadge.objects.values_list('user_course_group_enrollment_id', flat=True))
+        self.assertEqual(awarded_enrollment_ids, {complete.id})
+
+    def test_nightly_sweep_only_checks_open_enrollments_of_expired_courses(self):
+        BadgeFactory(name="Completionist", type="Course")
+        enrollments = []
+        for status in ("Expired", "Active"):
+            course_group = CourseGroupFactory(course=CourseFactory(status=status))
+            quest = QuestFactory(course_group=course_group)
+            enrollment = UserCourseGroupEnrollmentFactory(course_group=course_group)
+            UserQuestAttemptFactory(student=enrollment.student, quest=quest, submitted=True)
+            enrollments.append(enrollment)
+
+        check_all_course_completions()
+        check_all_course_completions()
+
+        expired_enrollment, active_enrollment = enrollments
+        self.assertIsNotNone(UserCourseGroupEnrollment.objects.get(id=expired_enrollment.id).completed_on)
+        self.assertIsNone(UserCourseGroupEnrollment.objects.get(id=active_enrollment.id).completed_on)
+        self.assertEqual(EduquestUser.objects.get(id=expired_enrollment.student_id).total_points, 50)
+
+
+class CalculateScoreAndIssuePointsTaskTest(TestCase):
+    @patch('api.tasks.group')
+    def test_writes_score_and_issues_points_after_commit(self, mock_group):
+        question = QuestionFactory(max_score=4)
+        answer = AnswerFactory(question=question, is_correct=True)
+        attempt = UserQuestAttemptFactory(quest=question.quest, submitted=True)
+        UserAnswerAttemptFactory(user_quest_attempt=attempt, question=question, answer=answer, is_selected=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            score_context = calculate_score_and_issue_points(attempt.id)
+
+        self.assertEqual(score_context['score'], 4)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.total_score_achieved, 4)
+        student = EduquestUser.objects.get(id=attempt.student_id)
+        self.assertEqual(student.total_points, 4)
+        self.assertEqual(student.current_points, 4)
+        perfectionist_signature, level_border_signature = mock_group.call_args.args[0]
+        self.assertEqual(perfectionist_signature.task, 'api.tasks.award_perfectionist_badge')
+        self.assertEqual(perfectionist_signature.args, (attempt.id,))
+        self.assertEqual(level_border_signature.task, 'api.tasks.award_level_border')
+        self.assertEqual(level_border_signature.args, (student.id,))
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch('api.tasks.group')
+    def test_scores_before_locking_the_student(self, mock_group):
+        attempt = UserQuestAttemptFactory(submitted=True)
+        outer_depth = len(connection.savepoint_ids)
+        scoring_depths = []
+
+        def score():
+            scoring_depths.append(len(connection.savepoint_ids))
+            return 3
+
+        with patch('api.models.UserQuestAttempt.calculate_total_score_achieved', side_effect=score):
+            score_context = calculate_score_and_issue_points(attempt.id)
+
+        self.assertEqual(score_context['score'], 3)
+        self.assertEqual(scoring_depths, [outer_depth])
+
+
+class AwardFirstAttemptBadgeTaskTest(BadgeTaskTestCase):
+    def test_duplicate_run_returns_memoized_result(self):
+        BadgeFactory(name="First Attempt", type="Quest Type")
+        attempt = UserQuestAttemptFactory(submitted=True)
+
+        result = award_first_attempt_badge({'attempt_id': attempt.id})
+        with self.assertNumQueries(0):
+            duplicate_result = award_first_attempt_badge({'attempt_id': attempt.id})
+
+        self.assertEqual(duplicate_result, result)
+        self.assertEqual(UserQuestBadge.objects.filter(user_quest_attempt=attempt).count(), 1)
+        self.assertEqual(EduquestUser.objects.get(id=attempt.student_id).total_points, 50)
+
+    def test_unsettled_result_is_not_memoized(self):
+        BadgeFactory(name="First Attempt", type="Quest Type")
+        attempt = UserQuestAttemptFactory(submitted=False)
+
+        result = award_first_attempt_badge({'attempt_id': attempt.id})
+        UserQuestAttempt.objects.filter(pk=attempt.pk).update(submitted=True)
+        retry_result = award_first_attempt_badge({'attempt_id': attempt.id})
+
+        self.assertIn("not submitted yet", result)
+        self.assertIn("Badge awarded", retry_result)
+        self.assertTrue(UserQuestBadge.objects.filter(user_quest_attempt=attempt).exists())
+
+    def test_missing_badge_result_is_not_memoized(self):
+        attempt = UserQuestAttemptFactory(submitted=True)
+
+        result = award_first_attempt_badge({'attempt_id': attempt.id})
+        BadgeFactory(name="First Attempt", type="Quest Type")
+        retry_result = award_first_attempt_badge({'attempt_id': attempt.id})
+
+        self.assertIn("does not exist", result)
+        self.assertIn("Badge awarded", retry_result)
+
+    def test_awards_badge_only_for_the_students_first_attempt(self):
+        BadgeFactory(name="First Attempt", type="Quest Type")
+        first_attempt = UserQuestAttemptFactory(submitted=True)
+        later_attempt = UserQuestAttemptFactory(student=first_attempt.student, submitted=True)
+
+        award_first_attempt_badge(first_attempt.id)
+        result = award_first_attempt_badge(later_attempt.id)
+
+        self.assertIn("already has the badge", result)
+        awarded_attempt_ids = set(UserQuestBadge.objects.values_list('user_quest_attempt_id', flat=True))
+        self.assertEqual(awarded_attempt_ids, {first_attempt.id})
+
+    def test_checks_for_the_badge_under_the_student_lock(self):
+        BadgeFactory(name="First Attempt", type="Quest Type")
+        attempt = UserQuestAttemptFactory(submitted=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            award_first_attempt_badge(attempt.id)
+
+        sql = [query['sql'] for query in queries]
+        lock_index = next(i for i, statement in enumerate(sql) if 'FOR UPDATE' in statement)
+        badge_check_index = next(i for i, statement in enumerate(sql) if 'api_userquestbadge' in statement)
+        self.assertLess(lock_index, badge_check_index)
+        self.assertEqual(EduquestUser.objects.get(id=attempt.student_id).total_points, 50)
+
+
+class AwardExpertBadgeTaskTest(BadgeTaskTestCase):
+    def test_awards_all_top_scorers_once(self):
+        BadgeFactory(name="Expert", type="Quest Type")
+        quest = QuestFactory(status='Expired')
+        QuestionFactory(quest=quest, max_score=10)
+        top_one = UserQuestAttemptFactory(quest=quest, total_score_achieved=8)
+        top_two = UserQuestAttemptFactory(quest=quest, total_score_achieved=8)
+        UserQuestAttemptFactory(quest=quest, total_score_achieved=5)
+
+        award_expert_badge(quest.id)
+        award_expert_badge(quest.id)
+
+        awarded_attempt_ids = set(UserQuestBadge.objects.values_list('user_quest_attempt_id', flat=True))
+        self.assertEqual(awarded_attempt_ids, {top_one.id, top_two.id})
+        for attempt in (top_one, top_two):
+            self.assertEqual(EduquestUser.objects.get(id=attempt.student_id).total_points, 50)
+
+
+class AwardSpeedsterBadgeTaskTest(BadgeTaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        BadgeFactory(name="Speedster", type="Quest Type")
+        cls.quest = QuestFactory(status='Expired')
+        QuestionFactory(quest=cls.quest, max_score=10)
+        cls.start = timezone.now() - timedelta(hours=1)
+
+    def _attempt(self, score, minutes):
+        return UserQuestAttemptFactory(
+            quest=self.quest,
+            total_score_achieved=score,
+            first_attempted_date=self.start,
+            last_attempted_date=self.start + timedelta(minutes=minutes)
+        )
+
+    def test_awards_fastest_attempt_with_top_three_score(self):
+        fastest = self._attempt(score=7, minutes=2)
+        self._attempt(score=9, minutes=10)
+        self._attempt(score=8, minutes=12)
+
+        award_speedster_badge(self.quest.id)
+
+        self.assertTrue(UserQuestBadge.objects.filter(user_quest_attempt=fastest).exists())
+
+    def test_skips_fastest_attempt_outside_top_three_scores(self):
+        self._attempt(score=6, minutes=2)
+        for score in (9, 8, 7):
+            self._attempt(score=score, minutes=10)
+
+        result = award_speedster_badge(self.quest.id)
+
+        self.assertIn("not among the top three", result)
+        self.assertFalse(UserQuestBadge.objects.exists())
+
+
+class FinalizeDocumentUploadTaskTest(TestCase):
+    def test_marks_a_stored_document_ready(self):
+        document = DocumentFactory()
+
+        finalize_document_upload(document.id)
+
+        document.refresh_from_db()
+        self.assertEqual(document.upload_state, 'ready')
+
+
+class RetryPendingDocumentUploadsTaskTest(TestCase):
+    @patch('api.tasks.group')
+    def test_dispatches_only_documents_pending_past_the_retry_window(self, mock_group):
+        stuck = DocumentFactory()
+        DocumentFactory()
+        Document.objects.filter(pk=stuck.pk).update(uploaded_at=timezone.now() - timedelta(hours=1))
+
+        retry_pending_document_uploads()
+
+        signatures = list(mock_group.call_args.args[0])
+        self.assertEqual([signature.task for signature in signatures], ['api.tasks.finalize_document_upload'])
+        self.assertEqual(signatures[0].args, (stuck.id,))
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch('api.tasks.DOCUMENT_RETRY_BATCH_SIZE', 2)
+    @patch('api.tasks.group')
+    def test_dispatches_at_most_one_batch_oldest_first(self, mock_group):
+        documents = [DocumentFactory() for _ in range(3)]
+        for hours, document in zip([1, 3, 2], documents):
+            Document.objects.filter(pk=document.pk).update(uploaded_at=timezone.now() - timedelta(hours=hours))
+
+        retry_pending_document_uploads()
+
+        dispatched_ids = [signature.args[0] for signature in mock_group.call_args.args[0]]
+        self.assertEqual(dispatched_ids, [documents[1].id, documents[2].id])
+
+    @patch('api.tasks.group')
+    def test_dispatches_nothing_without_stale_documents(self, mock_group):
+        DocumentFactory()
+
+        retry_pending_document_uploads()
+
+        mock_group.assert_not_called()
@@ -1407,11 +1407,12 @@ class UserAnswerAttemptViewSetTest(BaseViewTest):
         """
         Test creating a new user answer attempt.
         """
+        answer3 = AnswerFactory(question=self.question1, text='Seville', is_correct=False, reason='Incorrect answer.')
         url = reverse('user-answer-attempts-list')
         data = {
             'user_quest_attempt_id': self.attempt1.id,
             'question_id': self.question1.id,
-            'answer_id': self.answer2.id,
+            'answer_id': answer3.id,
             'is_selected': True,
             'score_achieved': 0
         }
@@ -1421,7 +1422,7 @@ class UserAnswerAttemptViewSetTest(BaseViewTest):
         new_attempt = UserAnswerAttempt.objects.get(id=response.data['id'])
         self.assertEqual(new_attempt.user_quest_attempt, self.attempt1)
         self.assertEqual(new_attempt.question, self.question1)
-        self.assertEqual(new_attempt.answer, self.answer2)
+        self.assertEqual(new_attempt.answer, answer3)
         self.assertTrue(new_attempt.is_selected)
         self.assertEqual(new_attempt.score_achieved, 0)
 
@@ -1702,14 +1703,14 @@ class UserQuestBadgeViewSetTest(BaseViewTest):
         """
         url = reverse('user-quest-badges-list')
         data = {
-            'badge_id': self.badge1.id,
+            'badge_id': self.badge3.id,
             'user_quest_attempt_id': self.attempt1.id,
         }
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(UserQuestBadge.objects.count(), 3)
         new_badge = UserQuestBadge.objects.get(id=response.data['id'])
-        self.assertEqual(new_badge.badge, self.badge1)
+        self.assertEqual(new_badge.badge, self.badge3)
         self.assertEqual(new_badge.user_quest_attempt, self.attempt1)
 
     def test_retrieve_user_quest_badge(self):
@@ -1728,12 +1729,12 @@ class UserQuestBadgeViewSetTest(BaseViewTest):
         """
         url = reverse('user-quest-badges-detail', args=[self.user_quest_badge1.id])
         data = {
-            'badge_id': self.badge2.id,  # Change badge
+            'badge_id': self.badge4.id,  # Change badge
         }
         response = self.client.patch(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         updated_badge = UserQuestBadge.objects.get(id=self.user_quest_badge1.id)
-        self.assertEqual(updated_badge.badge, self.badge2)
+        self.assertEqual(updated_badge.badge, self.badge4)
 
     def test_delete_user_quest_badge(self):
         """
@@ -1,3 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
+
+
 def split_full_name(full_name):
     """
     Splits a full name into first and last names.
@@ -16,3 +19,13 @@ def split_full_name(full_name):
         last_name = ""
 
     return first_name, last_name
+
+
+class UnicodeJSONEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder that writes non-ASCII characters as-is instead of \\uXXXX escapes.
+    Used by JSONFields holding generated feedback and topic names.
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs['ensure_ascii'] = False
+        super().__init__(*args, **kwargs)
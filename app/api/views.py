@@ -708,7 +708,7 @@ class QuestViewSet(viewsets.ModelViewSet):
                         # Get the generated empty-prefilled UserAnswerAttempt objects for the UserQuestAttempt
                         user_answer_attempts = UserAnswerAttempt.objects.filter(
                             user_quest_attempt=new_user_quest_attempt_id
-                        )
+                        ).select_related('question', 'answer')
                     except Exception as e:
                         raise ValidationError({"Error creating user quest attempt": str(e)})
 
@@ -1187,7 +1187,7 @@ class UserAnswerAttemptViewSet(viewsets.ModelViewSet):
 
                 try:
                     # Retrieve the instance to update
-                    attempt_instance = UserAnswerAttempt.objects.get(id=attempt_id)
+                    attempt_instance = UserAnswerAttempt.objects.select_related('answer').get(id=attempt_id)
                 except UserAnswerAttempt.DoesNotExist:
                     return Response({"error": f"UserAnswerAttempt with id {attempt_id} not found."},
                                     status=status.HTTP_404_NOT_FOUND)
@@ -1,6 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.schedules import crontab
 from datetime import timedelta
 
 
@@ -27,6 +28,14 @@ app.conf.beat_schedule = {
         'task': 'api.tasks.check_expired_quest',
         'schedule': timedelta(seconds=30),
     },
+    'check-all-course-completions-nightly': {
+        'task': 'api.tasks.check_all_course_completions',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'retry-pending-document-uploads': {
+        'task': 'api.tasks.retry_pending_document_uploads',
+        'schedule': timedelta(minutes=15),
+    },
 }
 
 # Load task modules from all registered Django app configs.
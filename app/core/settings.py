@@ -139,6 +139,11 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', ''),
         'PORT': os.environ.get('DB_PORT', ''),
+        # Keep connections open between requests and Celery tasks, checking them before reuse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        # Set DB_PGBOUNCER=1 when DB_HOST points at PgBouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': bool(int(os.environ.get('DB_PGBOUNCER', 0))),
     }
 }
 
@@ -234,6 +239,18 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Singapore'
+# Task output goes through logging, so leave stdout alone
+CELERY_WORKER_REDIRECT_STDOUTS = False
 FLASK_MICROSERVICE_URL = os.getenv('FLASK_MICROSERVICE_URL', 'http://localhost:5000')
 
+# Share the cache (badge ids, memoized task results) between the app and the Celery workers through Redis,
+# falling back to the per-process local memory cache when no Redis host is configured
+if os.getenv('REDIS_HOST'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f'redis://{REDIS_HOST}:6379/1',
+        }
+    }
+
 